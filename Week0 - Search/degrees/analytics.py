@@ -0,0 +1,283 @@
+"""
+Whole-graph facts about a degrees dataset.
+
+Connected components come from one union-find pass over every movie's cast,
+after which "are these two people connected at all?" is a single lookup.
+Eccentricities are bounded by a sweep of breadth-first searches, the first
+started from the person with the most movies and each later one from the
+person whose bounds are furthest apart: for a person v and starts s,
+max d(s, v) <= ecc(v) <= min (d(s, v) + ecc(s)). Results can be saved next
+to the dataset and are reused until its CSV files change.
+
+Usage: python analytics.py directory [sweeps]
+"""
+import json
+import os
+import sys
+from array import array
+from collections import Counter
+
+import snapshot
+from graph import Graph
+from snapshot import Sections
+from trees import SourceTree
+
+MAGIC = b"DEGSTAT2"
+FILENAME = "degrees.analytics"
+
+# The arrays of Analytics and their type codes, as they are saved (the
+# eccentricity bounds only after a sweep)
+ARRAYS = (("components", "i"), ("sizes", "i"), ("lower", "h"), ("upper", "h"))
+
+
+class Analytics():
+    """
+    components[p] labels the connected component of person p, and sizes[c]
+    is the number of people in component c. After a sweep, lower[p] and
+    upper[p] bound the eccentricity of everyone in the largest component
+    (-1 elsewhere), and summary holds the diameter bounds.
+    """
+
+    def __init__(self, graph, components, sizes, summary=None,
+                 lower=None, upper=None):
+        self.graph = graph
+        self.components = components
+        self.sizes = sizes
+        self.summary = {} if summary is None else summary
+        self.lower = lower
+        self.upper = upper
+
+    @classmethod
+    def compute(cls, graph):
+        """
+        Labels the connected components of graph with union-find.
+        """
+        parents = array("i", range(len(graph.person_ids)))
+
+        def find(person):
+            while parents[person] != person:
+                parents[person] = parents[parents[person]]
+                person = parents[person]
+            return person
+
+        # Everyone in a movie joins the component of its first star.
+        movie_offsets, movie_stars = graph.movie_offsets, graph.movie_stars
+        for movie in range(len(graph.movie_ids)):
+            start, end = movie_offsets[movie], movie_offsets[movie + 1]
+            if end - start < 2:
+                continue
+            root = find(movie_stars[start])
+            for j in range(start + 1, end):
+                other = find(movie_stars[j])
+                if other != root:
+                    parents[other] = root
+
+        # Relabel the roots densely, in order of first appearance.
+        labels = {}
+        components = array("i", [0]) * len(parents)
+        sizes = array("i")
+        for person in range(len(parents)):
+            root = find(person)
+            label = labels.get(root)
+            if label is None:
+                label = labels[root] = len(sizes)
+                sizes.append(0)
+            components[person] = label
+            sizes[label] += 1
+        return cls(graph, components, sizes)
+
+    def connected(self, source, target):
+        """
+        Returns whether any path at all joins two people.
+        """
+        return self.components[source] == self.components[target]
+
+    def largest(self):
+        """
+        Returns the label of the largest connected component.
+        """
+        return max(range(len(self.sizes)), key=self.sizes.__getitem__)
+
+    def component_histogram(self):
+        """
+        Maps every component size to how many components have it.
+        """
+        return dict(sorted(Counter(self.sizes).items()))
+
+    def degree_histograms(self):
+        """
+        Returns histograms (degree -> count) of the movies per person,
+        co-star links per person (counted once per shared movie) and
+        cast size per movie.
+        """
+        graph = self.graph
+        person_offsets, person_movies = graph.person_offsets, graph.person_movies
+        movie_offsets = graph.movie_offsets
+        cast = [movie_offsets[movie + 1] - movie_offsets[movie]
+                for movie in range(len(graph.movie_ids))]
+        movies = Counter()
+        costars = Counter()
+        for person in range(len(graph.person_ids)):
+            start, end = person_offsets[person], person_offsets[person + 1]
+            movies[end - start] += 1
+            costars[sum(cast[person_movies[k]] - 1
+                        for k in range(start, end))] += 1
+        return {
+            "movies": dict(sorted(movies.items())),
+            "costars": dict(sorted(costars.items())),
+            "cast": dict(sorted(Counter(cast).items()))
+        }
+
+    def sweep(self, count=4):
+        """
+        Runs count breadth-first searches over the largest component, the
+        first from the member with the most movies and each later one from
+        the member whose eccentricity bounds are furthest apart, to bound
+        every eccentricity there and the diameter of the component. Returns
+        the (lower, upper) diameter bounds.
+        """
+        graph = self.graph
+        component = self.largest()
+        size = len(graph.person_ids)
+        lower = array("h", [-1]) * size
+        upper = array("h", [-1]) * size
+        members = [person for person in range(size)
+                   if self.components[person] == component]
+        for person in members:
+            lower[person] = 0
+            upper[person] = 0x7fff
+
+        # Start from the member with the most movies.
+        offsets = graph.person_offsets
+        start = max(members, key=lambda p: offsets[p + 1] - offsets[p])
+        starts = []
+        for _ in range(min(count, len(members))):
+            starts.append(graph.person_ids[start])
+            distances = SourceTree.build(graph, start).distances
+            eccentricity = max(distances[person] for person in members)
+            for person in members:
+                distance = distances[person]
+                if distance > lower[person]:
+                    lower[person] = distance
+                if distance + eccentricity < upper[person]:
+                    upper[person] = distance + eccentricity
+
+            # The next start is the one the sweep knows least about.
+            start = max(members, key=lambda p: (upper[p] - lower[p], lower[p]))
+
+        self.lower = lower
+        self.upper = upper
+        self.summary["sweep"] = {
+            "component": component,
+            "starts": starts,
+            "diameter": [max(lower[person] for person in members),
+                         min(max(upper[person] for person in members),
+                             2 * min(upper[person] for person in members))]
+        }
+        return tuple(self.summary["sweep"]["diameter"])
+
+    def eccentricity(self, person):
+        """
+        Returns (lower, upper) bounds on the eccentricity of a person in the
+        swept component, or None for anyone else.
+        """
+        if self.lower is None or self.lower[person] < 0:
+            return None
+        return self.lower[person], self.upper[person]
+
+    def report(self):
+        """
+        Returns a dictionary of the analytics worth printing.
+        """
+        sizes = self.sizes
+        return {
+            "people": len(self.components),
+            "components": len(sizes),
+            "largest_component": max(sizes) if len(sizes) else 0,
+            "isolated_people": sum(1 for size in sizes if size == 1),
+            "component_sizes": self.component_histogram(),
+            "degrees": self.degree_histograms(),
+            **self.summary
+        }
+
+    def save(self, path, sources):
+        """
+        Writes the components, sweep bounds and summary to path, tagged with
+        the fingerprint of the source CSV files they come from. Returns
+        whether they could be written; if not, they are just not cached.
+        """
+        sections = Sections()
+        header = {
+            "sources": sources,
+            "summary": self.summary,
+            "sections": {
+                name: sections.place(array(code, getattr(self, name)).tobytes())
+                for name, code in ARRAYS if getattr(self, name) is not None}
+        }
+        try:
+            snapshot.write(path, MAGIC, header, sections)
+        except OSError:
+            return False
+        return True
+
+    @classmethod
+    def load(cls, graph, directory, path=None):
+        """
+        Memory-maps saved analytics of graph, or returns None if there are
+        none or the dataset in directory has changed since.
+        """
+        if path is None:
+            path = default_path(directory)
+        found = snapshot.read(path, MAGIC, directory)
+        if found is None:
+            return None
+        header, section = found
+        arrays = {name: section(*header["sections"][name]).cast(code)
+                  for name, code in ARRAYS if name in header["sections"]}
+        if len(arrays["components"]) != len(graph.person_ids):
+            return None
+        return cls(graph, arrays["components"], arrays["sizes"],
+                   header["summary"], arrays.get("lower"), arrays.get("upper"))
+
+
+def default_path(directory):
+    """
+    Returns where the analytics of a dataset directory live by default.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def load_or_compute(graph, directory, persist=False):
+    """
+    Returns the saved analytics of graph if they are still valid, or else
+    computes its components (saving them too if persist is set and the
+    directory can be written to).
+    """
+    analytics = Analytics.load(graph, directory)
+    if analytics is None:
+        analytics = Analytics.compute(graph)
+        if persist:
+            analytics.save(default_path(directory),
+                           snapshot.fingerprint(directory))
+    return analytics
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python analytics.py directory [sweeps]")
+    directory = sys.argv[1]
+    sweeps = int(sys.argv[2]) if len(sys.argv) == 3 else 4
+
+    graph = snapshot.load(directory)
+    if graph is None:
+        graph = Graph.from_csv(directory)
+    analytics = Analytics.load(graph, directory)
+    if analytics is None or "sweep" not in analytics.summary:
+        analytics = Analytics.compute(graph)
+        analytics.sweep(sweeps)
+        analytics.save(default_path(directory), snapshot.fingerprint(directory))
+    print(json.dumps(analytics.report(), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Answer a file of degrees queries on a pool of worker processes.
+
+The compact graph is loaded once in the parent. Workers are forked from it,
+so they all read the same pages (with a snapshot, the same mapped file)
+instead of each loading a copy. Results are written as JSON lines in
+query order while the rest of the batch is still running.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from time import perf_counter
+
+import degrees
+
+
+def resolve(name):
+    """
+    Returns (person index, error) for a name, without prompting: people
+    sharing a name are told apart by movie count, and a misspelt name
+    falls back to the closest known one.
+    """
+    person = degrees.name_index.resolve(name)
+    if person is None:
+        return None, "Person not found."
+    return person, None
+
+
+def answer(query):
+    """
+    Answers one numbered (line number, source name, target name) query
+    and returns its result as a dictionary.
+    """
+    number, source_name, target_name = query
+    graph = degrees.graph
+    start = perf_counter()
+    result = {"query": number, "source": source_name, "target": target_name}
+
+    source, error = resolve(source_name)
+    if error is None:
+        target, error = resolve(target_name)
+    if error is None:
+        result["source_id"] = graph.person_ids[source]
+        result["target_id"] = graph.person_ids[target]
+        path = None
+        if degrees.analytics.connected(source, target):
+            path = degrees.trees.shortest_path(source, target, True)
+        if path is None:
+            error = "Not connected."
+        else:
+            result["degrees"] = len(path)
+            result["path"] = graph.path_ids(path)
+    if error is not None:
+        result["error"] = error
+
+    result["latency_ms"] = round((perf_counter() - start) * 1000, 3)
+    return result
+
+
+def read_queries(f):
+    """
+    Yields (line number, source name, target name) for every
+    comma-separated pair of names in f, skipping blank lines.
+    """
+    for number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        source, _, target = line.partition(",")
+        yield number, source.strip(), target.strip()
+
+
+def initialize(directory):
+    """
+    Loads the graph in a worker that was not forked from a loaded parent.
+    """
+    if degrees.graph is None:
+        degrees.load_data(directory, compact=True, hubs=0)
+
+
+def run(directory, queries, output, processes=None, chunksize=64, hubs=0):
+    """
+    Answers every query on a process pool and writes each result
+    to output as one JSON line, in query order. The trees of the hubs
+    best-connected people are computed first, for all workers to share.
+    """
+    degrees.load_data(directory, compact=True, hubs=0)
+    degrees.trees.precompute_hubs(hubs)
+
+    # Read names and titles and build the fuzzy name index (unless the
+    # snapshot holds it) now, or every worker would make its own copy.
+    degrees.graph.load_side_columns()
+    degrees.name_index.prepare()
+
+    # Forked workers share the parent's graph; elsewhere each maps its own.
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    with context.Pool(processes, initialize, (directory,)) as pool:
+        for result in pool.imap(answer, queries, chunksize):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory", help="dataset folder")
+    parser.add_argument("file", help="comma-separated pairs of names")
+    parser.add_argument("-o", "--output", help="JSON lines file to write")
+    parser.add_argument("-p", "--processes", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=64,
+                        help="queries sent to a worker at a time")
+    parser.add_argument("--hubs", type=int, default=0,
+                        help="hub trees to compute before starting workers")
+    args = parser.parse_args()
+
+    with open(args.file, encoding="utf-8") as f:
+        queries = read_queries(f)
+        if args.output is None:
+            run(args.directory, queries, sys.stdout,
+                args.processes, args.chunksize, args.hubs)
+        else:
+            with open(args.output, "w", encoding="utf-8") as output:
+                run(args.directory, queries, output,
+                    args.processes, args.chunksize, args.hubs)
+
+
+if __name__ == "__main__":
+    main()
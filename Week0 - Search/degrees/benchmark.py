@@ -0,0 +1,148 @@
+"""
+Compare the breadth-first search engines on one or more datasets, or with
+--since/--until, year-constrained searches against unconstrained ones.
+"""
+import argparse
+import os
+import random
+from time import time
+
+import degrees
+from util import SearchStats
+
+
+def run(search, source, target):
+    """
+    Runs search(source, target, stats) and returns (path, stats).
+    """
+    stats = SearchStats()
+    path = search(source, target, stats)
+    return path, stats
+
+
+def sample_queries(count, seed, person_ids=None):
+    """
+    Returns count random (source, target) person_id pairs
+    from the loaded data, reproducible for a given seed.
+    """
+    generator = random.Random(seed)
+    if person_ids is None:
+        person_ids = degrees.people
+    person_ids = sorted(person_ids)
+    return [tuple(generator.sample(person_ids, 2)) for _ in range(count)]
+
+
+def benchmark(directory, count, seed):
+    """
+    Loads a dataset and runs the same queries through both engines.
+    """
+    for table in (degrees.names, degrees.people, degrees.movies):
+        table.clear()
+    start = time()
+    degrees.load_data(directory)
+    print(f"{directory}: loaded {len(degrees.people)} people and "
+          f"{len(degrees.movies)} movies in {round(time() - start, 2)}s")
+
+    engines = [
+        ("one-sided", lambda s, t, stats: degrees.shortest_path(
+            s, t, False, stats)),
+        ("bidirectional", lambda s, t, stats: degrees.shortest_path(
+            s, t, True, stats))
+    ]
+    totals = {name: [0, 0.0] for name, _ in engines}
+
+    print(f"{'query':>20} {'degrees':>8} " + " ".join(
+        f"{name + ' nodes':>20} {name + ' s':>18}" for name, _ in engines))
+    for source, target in sample_queries(count, seed):
+        row = []
+        lengths = set()
+        for name, search in engines:
+            path, stats = run(search, source, target)
+            expanded, elapsed = stats.nodes_expanded, stats.total_time
+            lengths.add(None if path is None else len(path))
+            totals[name][0] += expanded
+            totals[name][1] += elapsed
+            row.append(f"{expanded:>20} {elapsed:>18.4f}")
+        if len(lengths) != 1:
+            raise Exception(f"engines disagree on {source} -> {target}")
+        length = lengths.pop()
+        degree = "-" if length is None else str(length)
+        print(f"{source + '->' + target:>20} {degree:>8} " + " ".join(row))
+
+    for name, (expanded, elapsed) in totals.items():
+        print(f"{name}: {expanded} nodes expanded, {round(elapsed, 4)}s")
+
+
+def benchmark_filter(directory, count, seed, since, until):
+    """
+    Loads a dataset as a compact graph and runs the same queries with and
+    without a movie-year constraint.
+    """
+    start = time()
+    degrees.load_data(directory, compact=True, hubs=0)
+    graph = degrees.graph
+    print(f"{directory}: loaded {len(graph.person_ids)} people and "
+          f"{len(graph.movie_ids)} movies in {round(time() - start, 2)}s")
+
+    accept = degrees.movie_filter(since, until)
+    years = f"{since or ''}-{until or ''}"
+    print(f"{'query':>20} {'degrees':>8} {years + ' degrees':>16} "
+          f"{'nodes':>10} {years + ' nodes':>16} "
+          f"{'s':>10} {years + ' s':>16}")
+    totals = [0, 0, 0.0, 0.0]
+    for source, target in sample_queries(count, seed, graph.person_ids):
+        path, stats = run(lambda s, t, stats: degrees.shortest_path(
+            s, t, True, stats), source, target)
+        constrained, constrained_stats = run(
+            lambda s, t, stats: degrees.shortest_path(s, t, True, stats, accept),
+            source, target)
+
+        # The constraint may only lengthen or cut paths, never use a movie
+        # it rejects.
+        if constrained is not None:
+            if path is None or len(constrained) < len(path) or not all(
+                    accept(graph.movie_index(movie_id))
+                    for movie_id, _ in constrained):
+                raise Exception(f"bad constrained path {source} -> {target}")
+
+        totals[0] += stats.nodes_expanded
+        totals[1] += constrained_stats.nodes_expanded
+        totals[2] += stats.total_time
+        totals[3] += constrained_stats.total_time
+        print(f"{source + '->' + target:>20} "
+              f"{'-' if path is None else len(path):>8} "
+              f"{'-' if constrained is None else len(constrained):>16} "
+              f"{stats.nodes_expanded:>10} {constrained_stats.nodes_expanded:>16} "
+              f"{stats.total_time:>10.4f} {constrained_stats.total_time:>16.4f}")
+
+    print(f"unconstrained: {totals[0]} nodes expanded, {round(totals[2], 4)}s")
+    print(f"{years}: {totals[1]} nodes expanded, {round(totals[3], 4)}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directories", nargs="*", default=["small"])
+    parser.add_argument("-n", "--queries", type=int, default=10,
+                        help="number of random queries per dataset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--since", type=int,
+                        help="compare against searches using only movies "
+                             "released in or after this year")
+    parser.add_argument("--until", type=int,
+                        help="compare against searches using only movies "
+                             "released in or before this year")
+    args = parser.parse_args()
+
+    for directory in args.directories:
+        if not os.path.isdir(directory):
+            print(f"Skipping {directory}: no such directory")
+            continue
+        if args.since is not None or args.until is not None:
+            benchmark_filter(directory, args.queries, args.seed,
+                             args.since, args.until)
+        else:
+            benchmark(directory, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
+import argparse
 import csv
 import sys
-from util import Node, StackFrontier, QueueFrontier
+from itertools import islice
+import tracemalloc
+import snapshot
+from analytics import load_or_compute
+from graph import Graph, report_peak_rss, report_progress
+from nameindex import NameIndex
+from paths import PathDAG, RANKINGS
+from trees import TreeCache
+from util import Node, FastQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -11,11 +20,44 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact graph holding all of the above, when loaded with compact=True
+graph = None
 
-def load_data(directory):
+# Cached shortest-path trees of single people in the compact graph
+trees = None
+
+# Exact, prefix and typo-tolerant name lookups in the compact graph
+name_index = None
+
+# Connected components (and other analytics) of the compact graph
+analytics = None
+
+# Number of best-connected people whose trees are cached once asked about
+HUBS = 3
+
+
+def load_data(directory, compact=False, hubs=HUBS, persist=False,
+              progress=None):
     """
     Load data from CSV files into memory.
+    If compact is set, load it as a Graph instead of the dictionaries,
+    memory-mapping a compiled snapshot when an up-to-date one exists
+    (or streaming the CSV files, calling progress(file, rows) as it goes),
+    label its connected components and mark the hubs best-connected people
+    whose shortest-path trees are cached the first time they are asked about
+    (both kept in the dataset directory if persist is set).
     """
+    if compact:
+        global graph, trees, name_index, analytics
+        graph = snapshot.load(directory)
+        if graph is None:
+            graph = Graph.from_csv(directory, progress)
+        name_index = NameIndex(graph)
+        analytics = load_or_compute(graph, directory, persist)
+        trees = TreeCache(graph, directory=directory if persist else None)
+        trees.mark_hubs(hubs)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,15 +93,65 @@ def load_data(directory):
                 pass
 
 
+def memory_report(directory):
+    """
+    Returns the bytes allocated by loading the directory as
+    dictionaries and as a compact graph, as a (dicts, graph) pair.
+    The graph is built from the CSV files with its names and titles,
+    since a memory-mapped snapshot is not allocated memory.
+    """
+    tracemalloc.start()
+    load_data(directory)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    names.clear()
+    people.clear()
+    movies.clear()
+
+    tracemalloc.clear_traces()
+    compact = Graph.from_csv(directory)
+    compact.load_side_columns()
+    graph_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del compact
+    return dict_bytes, graph_bytes
+
+
 def main():
-    if len(sys.argv) != 4:
-        sys.exit("Usage: python degrees.py directory file")
-    directory = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description="Degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the data as a compact graph")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="compare the memory used by both layouts")
+    parser.add_argument("--hubs", type=int, default=HUBS,
+                        help="hubs whose trees are cached with --compact")
+    parser.add_argument("--since", type=int,
+                        help="only use movies released in or after this year")
+    parser.add_argument("--until", type=int,
+                        help="only use movies released in or before this year")
+    parser.add_argument("--persist", action="store_true",
+                        help="keep precomputed trees and components "
+                             "next to the dataset")
+    args = parser.parse_args()
+    directory = args.directory
+
+    if args.memory_report:
+        dict_bytes, graph_bytes = memory_report(directory)
+        print(f"Dictionaries:  {dict_bytes / 2 ** 20:10.2f} MiB")
+        print(f"Compact graph: {graph_bytes / 2 ** 20:10.2f} MiB")
+        print(f"Saving: {1 - graph_bytes / max(dict_bytes, 1):.1%}")
+        return
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=args.compact, hubs=args.hubs,
+              persist=args.persist, progress=report_progress)
     print("Data loaded.")
+    if args.compact:
+        report_peak_rss()
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -68,7 +160,11 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    accept = None
+    if args.since is not None or args.until is not None:
+        accept = movie_filter(args.since, args.until)
+    path = shortest_path(source, target, bidirectional=args.bidirectional,
+                         accept=accept)
 
     if path is None:
         print("Not connected.")
@@ -77,27 +173,74 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, stats=None,
+                  accept=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If no possible path, returns None; from a person to themselves
+    it is the empty list, whichever engine searches.
+    If bidirectional is set, the search expands from both ends at once.
+    If stats is a SearchStats, the search records what it did in it.
+    If accept is a movie predicate (see movie_filter), only the movies it
+    accepts are used.
+    """
+    if stats is not None:
+        stats.start()
+
+    if graph is not None:
+        source, target = graph.person_index(source), graph.person_index(target)
+        if not analytics.connected(source, target):
+            # Different components: there is nothing to search for.
+            if stats is not None:
+                stats.engine = "components"
+            path = None
+        else:
+            path = trees.shortest_path(
+                source, target, bidirectional, stats, accept)
+        if path is not None:
+            path = graph.path_ids(path)
+    elif bidirectional:
+        path = bidirectional_shortest_path(source, target, stats, accept)
+    else:
+        path = breadth_first_path(source, target, stats, accept)
+
+    if stats is not None:
+        stats.finish(path)
+    return path
+
+
+def breadth_first_path(source, target, stats=None, accept=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from the source, through movies the accept predicate allows.
+
     If no possible path, returns None.
     """
+    def neighbors(person_id):
+        return neighbors_for_person(person_id, accept)
+    if stats is not None:
+        stats.engine = "bfs"
+        neighbors = stats.timed(neighbors)
+
+    if source == target:
+        return []
 
     # Starting with a frontier that contains the initial state.
     start = Node(source, None, None)
-    frontier = QueueFrontier()  # Breadth-First Search Algorithm
+    frontier = FastQueueFrontier(stats)  # Breadth-First Search Algorithm
     frontier.add(start)
 
-    # Initialize an empty explored state list
-    explored = []
+    # Initialize an empty explored state set
+    explored = set()
 
     # Keep looping until the solution is found.
     while True:
@@ -110,10 +253,14 @@ def shortest_path(source, target):
         node = frontier.remove()
 
         # Mark as explored
-        explored.append(node.state)
+        explored.add(node.state)
+        if stats is not None:
+            if node.depth > len(stats.layer_times):
+                stats.end_layer()
+            stats.nodes_expanded += 1
 
         # Add possible future states to frontier
-        for action, state in neighbors_for_person(node.state):
+        for action, state in neighbors(node.state):
             # If the state is not in the fontier or the explores state
             if not frontier.contains_state(state) and state not in explored:
                 child = Node(state, node, action)
@@ -134,20 +281,185 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def bidirectional_shortest_path(source, target, stats=None, accept=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both people at once until the two searches meet, through
+    movies the accept predicate allows.
+
+    If no possible path, returns None.
+    """
+    def neighbors(person_id):
+        return neighbors_for_person(person_id, accept)
+    if stats is not None:
+        stats.engine = "bidirectional"
+        neighbors = stats.timed(neighbors)
+
+    if source == target:
+        return []
+
+    # Each side maps a reached person to (next person, movie) on the way
+    # back to the side's own root, so either half of the path can be rebuilt.
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Always grow the smaller layer; that keeps both searches shallow.
+        if len(forward_layer) <= len(backward_layer):
+            layer, parents, other = forward_layer, forward, backward
+        else:
+            layer, parents, other = backward_layer, backward, forward
+
+        # Expand the whole layer, so the best meeting point in it is found.
+        next_layer = []
+        meeting = None
+        for person_id in layer:
+            for movie_id, neighbor in neighbors(person_id):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (person_id, movie_id)
+                if neighbor in other:
+                    length = _depth(parents, neighbor) + _depth(other, neighbor)
+                    if meeting is None or length < meeting[0]:
+                        meeting = (length, neighbor)
+                next_layer.append(neighbor)
+
+        if stats is not None:
+            stats.nodes_expanded += len(layer)
+            stats.frontier_size(len(forward_layer) + len(backward_layer)
+                                - len(layer) + len(next_layer))
+            stats.end_layer()
+
+        if meeting is not None:
+            return _join_paths(forward, backward, meeting[1])
+
+        if layer is forward_layer:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    return None
+
+
+def _depth(parents, person_id):
+    """
+    Returns the number of steps from person_id back to the root of parents.
+    """
+    depth = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][0]
+        depth += 1
+    return depth
+
+
+def _join_paths(forward, backward, meeting):
+    """
+    Builds the (movie_id, person_id) path through the meeting person from
+    the parent maps of a bidirectional search.
+    """
+    solution = []
+
+    # Walk back from the meeting person to the source.
+    person_id = meeting
+    while forward[person_id] is not None:
+        parent, movie_id = forward[person_id]
+        solution.append([movie_id, person_id])
+        person_id = parent
+    solution.reverse()
+
+    # Walk on from the meeting person to the target.
+    person_id = meeting
+    while backward[person_id] is not None:
+        child, movie_id = backward[person_id]
+        solution.append([movie_id, child])
+        person_id = child
+
+    return solution
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that connects
+    the source to the target in the compact graph, one at a time.
+    """
+    require_compact()
+    dag = PathDAG(graph, graph.person_index(source), graph.person_index(target))
+    for path in dag.paths():
+        yield graph.path_ids(path)
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns how many shortest paths connect the source to the target
+    in the compact graph, without building them.
+    """
+    require_compact()
+    return PathDAG(graph, graph.person_index(source),
+                   graph.person_index(target)).count()
+
+
+def top_shortest_paths(source, target, k, rank="recent"):
+    """
+    Returns up to k shortest paths from the source to the target in the
+    compact graph, best first by rank: "recent" or "oldest" movies, or
+    "popular" (the biggest casts).
+    """
+    require_compact()
+    dag = PathDAG(graph, graph.person_index(source), graph.person_index(target))
+    ranked = dag.ranked(RANKINGS[rank](graph))
+    return [graph.path_ids(path) for path in islice(ranked, k)]
+
+
+def require_compact():
+    """
+    Raises an exception unless the data was loaded as a compact graph.
+    """
+    if graph is None:
+        raise Exception("shortest-path enumeration needs the compact graph; "
+                        "load_data(directory, compact=True) first")
+
+
+def precompute(person_id):
+    """
+    Runs one breadth-first search from a person in the compact graph and
+    caches it, so every later shortest_path from or to them is a lookup.
+    Returns the person's SourceTree.
+    """
+    return trees.tree(graph.person_index(person_id))
+
+
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If interactive is False, nobody is asked: the person with the name who
+    starred in the most movies is picked, or in the compact graph, the
+    closest name within a couple of typos if nobody has the exact name.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        if not interactive:
+            person = name_index.resolve(name)
+            return None if person is None else graph.person_ids[person]
+        person_ids = [graph.person_ids[person]
+                      for person in name_index.exact(name)]
+    else:
+        person_ids = sorted(names.get(name.lower(), set()),
+                            key=lambda person_id: (
+                                -len(people[person_id]["movies"]), person_id))
+        if not interactive:
+            return person_ids[0] if person_ids else None
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -160,18 +472,71 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
-def neighbors_for_person(person_id):
+def movie_filter(since=None, until=None):
+    """
+    Returns a predicate for shortest_path and neighbors_for_person that
+    accepts movies released from since to until (inclusive; either may be
+    None), for whichever layout is loaded. Movies without a known year are
+    rejected once any bound is given.
+    """
+    if graph is not None:
+        return graph.released(since, until)
+    low = 1 if since is None else since
+    high = float("inf") if until is None else until
+
+    def accept(movie_id):
+        year = movies[movie_id]["year"]
+        return year.isdigit() and low <= int(year) <= high
+    return accept
+
+
+def neighbors_for_person(person_id, accept=None):
     """
     Returns (movie_id, person_id) pairs for people
-    who starred with a given person.
+    who starred with a given person, in movies
+    the accept predicate allows if one is given.
     """
+    if graph is not None:
+        return {(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in graph.neighbors(
+                    graph.person_index(person_id), accept)}
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
+        if accept is not None and not accept(movie_id):
+            continue
         for person_id in movies[movie_id]["stars"]:
             neighbors.add((movie_id, person_id))
     return neighbors
 
 
+def person_name(person_id):
+    """
+    Returns the name of a person, whichever way the data was loaded.
+    """
+    if graph is not None:
+        return graph.person_names[graph.person_index(person_id)]
+    return people[person_id]["name"]
+
+
+def person_birth(person_id):
+    """
+    Returns the birth year of a person, whichever way the data was loaded.
+    """
+    if graph is not None:
+        return graph.person_births[graph.person_index(person_id)]
+    return people[person_id]["birth"]
+
+
+def movie_title(movie_id):
+    """
+    Returns the title of a movie, whichever way the data was loaded.
+    """
+    if graph is not None:
+        return graph.movie_titles[graph.movie_index(movie_id)]
+    return movies[movie_id]["title"]
+
+
 if __name__ == "__main__":
     main()
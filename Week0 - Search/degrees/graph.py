@@ -0,0 +1,513 @@
+"""
+Compact people/movies graph for the degrees searches.
+
+People and movies are numbered 0..n-1 in file order. Who starred in what is
+kept in compressed-sparse-row form: the movies of person p are
+person_movies[person_offsets[p]:person_offsets[p + 1]], and the stars of
+movie m are movie_stars[movie_offsets[m]:movie_offsets[m + 1]].
+
+Searches take an optional movie predicate and simply do not use the movies
+it rejects, so constrained queries ("only movies since 1990") run on the
+same graph as every other query.
+"""
+import csv
+import heapq
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from operator import itemgetter
+
+# Rows parsed between progress reports while streaming a CSV file
+CHUNK_ROWS = 1 << 16
+
+
+class StringTable():
+    """
+    List of strings packed into one UTF-8 buffer.
+    String i is data[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, data=None, offsets=None):
+        self.data = bytearray() if data is None else data
+        self.offsets = array("i", [0]) if offsets is None else offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        table = cls()
+        for string in strings:
+            table.append(string)
+        return table
+
+    def append(self, string):
+        self.data += string.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class SortedView():
+    """
+    Sequence of table[order[i]] (optionally passed through key),
+    sorted by construction so it can be searched with bisect.
+    """
+
+    def __init__(self, table, order, key=None):
+        self.table = table
+        self.order = order
+        self.key = key
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        value = self.table[self.order[i]]
+        return value if self.key is None else self.key(value)
+
+
+def sorted_order(table, key=None):
+    """
+    Returns an array of table indices in the sorted order of their strings.
+    """
+    view = SortedView(table, range(len(table)), key)
+    return array("i", sorted(range(len(table)), key=view.__getitem__))
+
+
+def read_chunks(path, columns, progress=None):
+    """
+    Yields the named columns of the rows of a CSV file, as lists of at most
+    CHUNK_ROWS tuples in the order of columns, calling progress(file name,
+    rows so far) after each. Columns are found by the names in the file's
+    header row, so they may come in any order, among others.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise Exception(f"{path} has no {', '.join(missing)} column")
+        indices = [header.index(column) for column in columns]
+        if len(indices) == 1:
+            index = indices[0]
+            pick = lambda row: (row[index],)
+        else:
+            pick = itemgetter(*indices)
+        rows = 0
+        while True:
+            chunk = [pick(row) for row in islice(reader, CHUNK_ROWS)]
+            if not chunk:
+                break
+            rows += len(chunk)
+            yield chunk
+            if progress is not None:
+                progress(os.path.basename(path), rows)
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes,
+    or None where the platform cannot tell.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def report_progress(name, rows):
+    """
+    Prints how many rows of a CSV file have been read so far.
+    """
+    print(f"  {name}: {rows} rows", flush=True)
+
+
+def report_peak_rss():
+    """
+    Prints the peak resident set size of this process, where known.
+    """
+    peak = peak_rss()
+    if peak is not None:
+        print(f"Peak RSS: {peak / 2 ** 20:.1f} MiB")
+
+
+def compress(rows, sources, targets):
+    """
+    Groups the (sources[k], targets[k]) edges by source into
+    compressed-sparse-row (offsets, targets) arrays for rows sources.
+    """
+    counts = array("i", [0]) * (rows + 1)
+    for source in sources:
+        counts[source + 1] += 1
+    for row in range(rows):
+        counts[row + 1] += counts[row]
+    offsets = array("i", counts)
+
+    grouped = array("i", [0]) * len(targets)
+    for source, target in zip(sources, targets):
+        grouped[counts[source]] = target
+        counts[source] += 1
+    return offsets, grouped
+
+
+class Graph():
+
+    # Every piece of data a graph is made of, in a fixed order.
+    COLUMNS = (
+        "person_ids", "person_names", "person_births",
+        "movie_ids", "movie_titles", "movie_years", "release_years",
+        "person_id_order", "movie_id_order", "name_order",
+        "person_offsets", "person_movies", "movie_offsets", "movie_stars"
+    )
+
+    # Columns only needed to show results, and the CSV file they are read
+    # from on first use when a graph is built straight from the CSV files.
+    SIDE_COLUMNS = {
+        "person_names": "people.csv",
+        "person_births": "people.csv",
+        "name_order": "people.csv",
+        "movie_titles": "movies.csv",
+        "movie_years": "movies.csv",
+        "release_years": "movies.csv"
+    }
+
+    def __init__(self, directory=None, hubs=None, fuzzy=None, **columns):
+        self.directory = directory
+        self.hub_ranking = hubs
+        self.fuzzy_index = fuzzy
+        for column in Graph.COLUMNS:
+            if column in columns:
+                setattr(self, column, columns[column])
+            elif directory is None or column not in Graph.SIDE_COLUMNS:
+                raise TypeError(f"missing graph column {column}")
+
+    def __getattr__(self, column):
+        # Only reached for columns that have not been loaded yet.
+        if column not in Graph.SIDE_COLUMNS or self.directory is None:
+            raise AttributeError(column)
+        if Graph.SIDE_COLUMNS[column] == "people.csv":
+            self._load_people()
+        else:
+            self._load_movies()
+        return self.__dict__[column]
+
+    @classmethod
+    def from_csv(cls, directory, progress=None):
+        """
+        Builds a graph from the people, movies and stars CSV files,
+        streaming them in chunks and keeping only the ids and who starred
+        in what. Names, births, titles and years are read when first used.
+        """
+        person_ids = StringTable()
+        person_index = {}
+        for chunk in read_chunks(f"{directory}/people.csv", ("id",),
+                                 progress):
+            for person_id, in chunk:
+                person_index[person_id] = len(person_index)
+                person_ids.append(person_id)
+
+        movie_ids = StringTable()
+        movie_index = {}
+        for chunk in read_chunks(f"{directory}/movies.csv", ("id",),
+                                 progress):
+            for movie_id, in chunk:
+                movie_index[movie_id] = len(movie_index)
+                movie_ids.append(movie_id)
+
+        # Stars naming an unknown person or movie are skipped.
+        stars_people = array("i")
+        stars_movies = array("i")
+        for chunk in read_chunks(f"{directory}/stars.csv",
+                                 ("person_id", "movie_id"), progress):
+            for person_id, movie_id in chunk:
+                person = person_index.get(person_id)
+                movie = movie_index.get(movie_id)
+                if person is not None and movie is not None:
+                    stars_people.append(person)
+                    stars_movies.append(movie)
+        del person_index, movie_index
+
+        person_offsets, person_movies = compress(
+            len(person_ids), stars_people, stars_movies)
+        movie_offsets, movie_stars = compress(
+            len(movie_ids), stars_movies, stars_people)
+
+        return cls(
+            directory,
+            person_ids=person_ids,
+            movie_ids=movie_ids,
+            person_id_order=sorted_order(person_ids),
+            movie_id_order=sorted_order(movie_ids),
+            person_offsets=person_offsets,
+            person_movies=person_movies,
+            movie_offsets=movie_offsets,
+            movie_stars=movie_stars
+        )
+
+    def load_side_columns(self):
+        """
+        Reads every side column that has not been loaded yet, e.g. before
+        forking workers that should share them.
+        """
+        if "person_names" not in self.__dict__:
+            self._load_people()
+        if "movie_titles" not in self.__dict__:
+            self._load_movies()
+
+    def _load_people(self):
+        """
+        Reads the names and births of people into their side columns.
+        """
+        names = StringTable()
+        births = StringTable()
+        for chunk in read_chunks(f"{self.directory}/people.csv",
+                                 ("name", "birth")):
+            for name, birth in chunk:
+                names.append(name)
+                births.append(birth)
+        if len(names) != len(self.person_ids):
+            raise Exception("people.csv changed since the graph was built")
+        self.person_names = names
+        self.person_births = births
+        self.name_order = sorted_order(names, str.lower)
+
+    def _load_movies(self):
+        """
+        Reads the titles and years of movies into their side columns,
+        with the years both as text and as ints (0 when unknown).
+        """
+        titles = StringTable()
+        years = StringTable()
+        release_years = array("i")
+        for chunk in read_chunks(f"{self.directory}/movies.csv",
+                                 ("title", "year")):
+            for title, year in chunk:
+                titles.append(title)
+                years.append(year)
+                release_years.append(int(year) if year.isdigit() else 0)
+        if len(titles) != len(self.movie_ids):
+            raise Exception("movies.csv changed since the graph was built")
+        self.movie_titles = titles
+        self.movie_years = years
+        self.release_years = release_years
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with the given id, or None.
+        """
+        return self._find(self.person_ids, self.person_id_order, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with the given id, or None.
+        """
+        return self._find(self.movie_ids, self.movie_id_order, movie_id)
+
+    @staticmethod
+    def _find(table, order, value):
+        view = SortedView(table, order)
+        i = bisect_left(view, value)
+        if i < len(view) and view[i] == value:
+            return order[i]
+        return None
+
+    def hubs(self, count):
+        """
+        Returns the count people with the most co-star links, best first,
+        from the ranking stored with the graph when it is long enough.
+        """
+        if count <= 0:
+            return []
+        if self.hub_ranking is not None and count <= len(self.hub_ranking):
+            return list(self.hub_ranking[:count])
+        movie_offsets = self.movie_offsets
+        costars = [movie_offsets[movie + 1] - movie_offsets[movie] - 1
+                   for movie in range(len(self.movie_ids))]
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        links = [sum(map(costars.__getitem__, person_movies[
+                     person_offsets[person]:person_offsets[person + 1]]))
+                 for person in range(len(self.person_ids))]
+        return heapq.nlargest(count, range(len(links)), key=links.__getitem__)
+
+    def people_named(self, name):
+        """
+        Returns the indices of every person with the name, ignoring case.
+        """
+        view = SortedView(self.person_names, self.name_order, str.lower)
+        name = name.lower()
+        start = bisect_left(view, name)
+        end = bisect_right(view, name, start)
+        return [self.name_order[i] for i in range(start, end)]
+
+    def released(self, since=None, until=None):
+        """
+        Returns a movie predicate accepting movies released from since to
+        until (inclusive; either may be None). Movies without a known year
+        are rejected once any bound is given.
+        """
+        years = self.release_years
+        low = 1 if since is None else since
+        high = float("inf") if until is None else until
+        return lambda movie: low <= years[movie] <= high
+
+    def neighbors(self, person, movies=None):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with the given person, in movies
+        accepted by the movies predicate if one is given.
+        """
+        person_movies, movie_stars = self.person_movies, self.movie_stars
+        movie_offsets = self.movie_offsets
+        for k in range(self.person_offsets[person],
+                       self.person_offsets[person + 1]):
+            movie = person_movies[k]
+            if movies is not None and not movies(movie):
+                continue
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def shortest_path(self, source, target, stats=None, movies=None):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source to the target, or None.
+        If stats is a util.SearchStats, the search records what it did in it.
+        If movies is a predicate, only movies it accepts are used.
+        """
+        if stats is not None:
+            stats.engine = "compact-bfs"
+        if source == target:
+            return []
+
+        parents = {source: None}
+        expanded_movies = set()
+        layer = [source]
+        while layer:
+            layer = self._expand(
+                parents, expanded_movies, layer, stats, movies)
+            if target in parents:
+                return self._trace(parents, target)
+        return None
+
+    def bidirectional_shortest_path(self, source, target, stats=None,
+                                    movies=None):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source to the target, searching from both
+        ends at once until the two searches meet, or None.
+        If stats is a util.SearchStats, the search records what it did in it.
+        If movies is a predicate, only movies it accepts are used.
+        """
+        if stats is not None:
+            stats.engine = "compact-bidirectional"
+        if source == target:
+            return []
+
+        # Each side maps a reached person to (next person, movie) on the way
+        # back to its own root, and remembers the movies it has expanded.
+        forward = ({source: None}, set())
+        backward = ({target: None}, set())
+        forward_layer = [source]
+        backward_layer = [target]
+
+        while forward_layer and backward_layer:
+
+            # Always grow the smaller layer; that keeps both searches shallow.
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer = self._expand(
+                    *forward, forward_layer, stats, movies)
+                layer, other = forward_layer, backward[0]
+            else:
+                backward_layer = self._expand(
+                    *backward, backward_layer, stats, movies)
+                layer, other = backward_layer, forward[0]
+
+            # The best meeting point of the layer gives the shortest path.
+            meetings = [person for person in layer if person in other]
+            if meetings:
+                meeting = min(meetings, key=lambda person: (
+                    self._depth(forward[0], person)
+                    + self._depth(backward[0], person)))
+                path = self._trace(forward[0], meeting)
+                person = meeting
+                while backward[0][person] is not None:
+                    child, movie = backward[0][person]
+                    path.append((movie, child))
+                    person = child
+                return path
+
+        return None
+
+    def expand(self, layer, expanded_movies, movies=None):
+        """
+        Yields (person, movie, star) for everyone who starred in a movie of
+        a person in layer, one layer of a breadth-first search: each movie
+        is expanded only the first time, and is then added to
+        expanded_movies; movies the movies predicate rejects are added too
+        but yield nothing. Every search over the graph goes through here.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for person in layer:
+            for k in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[k]
+
+                # Everyone in a movie is reached the first time it is expanded;
+                # a rejected movie is marked too, so it is only tested once.
+                if movie in expanded_movies:
+                    continue
+                expanded_movies.add(movie)
+                if movies is not None and not movies(movie):
+                    continue
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    yield person, movie, movie_stars[j]
+
+    def _expand(self, parents, expanded_movies, layer, stats=None,
+                movies=None):
+        """
+        Expands every person in layer for one side of a search
+        and returns the people reached for the first time,
+        skipping movies the movies predicate rejects.
+        """
+        next_layer = []
+        for person, movie, star in self.expand(layer, expanded_movies, movies):
+            if star not in parents:
+                parents[star] = (person, movie)
+                next_layer.append(star)
+
+        if stats is not None:
+            stats.nodes_expanded += len(layer)
+            stats.frontier_size(len(next_layer))
+            stats.end_layer()
+        return next_layer
+
+    @staticmethod
+    def _depth(parents, person):
+        depth = 0
+        while parents[person] is not None:
+            person = parents[person][0]
+            depth += 1
+        return depth
+
+    @staticmethod
+    def _trace(parents, person):
+        path = []
+        while parents[person] is not None:
+            parent, movie = parents[person]
+            path.append((movie, person))
+            person = parent
+        path.reverse()
+        return path
+
+    def path_ids(self, path):
+        """
+        Converts a path of (movie, person) indices into
+        [movie_id, person_id] pairs.
+        """
+        return [[self.movie_ids[movie], self.person_ids[person]]
+                for movie, person in path]
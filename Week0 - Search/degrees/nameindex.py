@@ -0,0 +1,518 @@
+"""
+Name lookups over a compact degrees Graph.
+
+Names are already sorted (case-insensitively) by the graph's name_order, so
+exact and prefix lookups are a bisect. Typo-tolerant lookups split every
+distinct name into d + 2 pieces, cut where names of its length differ about
+equally (so "Person 123" is not split into "Per", "son" and the digits): d
+edits can break at most d of them, so a name within edit distance d of the
+query still has two pieces that appear in the query unchanged, shifted by
+at most d. Every pair of pieces is indexed by a hash of (pieces, name
+length, pair number) in one sorted array, stored in the snapshot or built
+on first use, so a lookup only finds names that share a whole pair with the
+query. Those whose letters differ too much are dropped by a bit mask before
+the rest are compared letter by letter.
+
+A lookup compares at most MAX_CANDIDATES names, those sharing the rarest
+pairs with the query first. Below that the answer is exact; when more names
+share pieces with the query (names that differ in few letters, such as
+"Person 1234" and "Person 1243"), it is the best of the names compared.
+
+People sharing a name are ranked by how many movies they starred in.
+
+Usage: python nameindex.py directory [-n queries]
+(checks typo-tolerant lookups against comparing the query with every name)
+"""
+import argparse
+import random
+import statistics
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from functools import cached_property, lru_cache
+from math import log2
+from time import perf_counter
+from zlib import crc32
+
+from graph import Graph, SortedView
+
+# Distinct names sampled to choose where the names of each length are cut
+CUT_SAMPLE = 100000
+
+# Most names a fuzzy lookup compares with the query in each round
+MAX_CANDIDATES = 300
+
+# Letters typos are made of in the check of main()
+TYPO_LETTERS = "abcdefghijklmnopqrstuvwxyz "
+
+
+def letter_masks(word):
+    """
+    Returns, for every letter of word, a mask with bit i set if word[i] is
+    that letter.
+    """
+    masks = {}
+    for i, letter in enumerate(word):
+        masks[letter] = masks.get(letter, 0) | 1 << i
+    return masks
+
+
+def edit_distance(a, b, limit, masks=None):
+    """
+    Returns the Levenshtein distance between a and b,
+    or limit + 1 if it is more than limit.
+
+    A column of the distance table is kept as one bit per letter of a, for
+    whether each entry is one more or one less than the one above it, so
+    each letter of b takes a few integer operations (Myers' algorithm);
+    masks are letter_masks(a), if the caller has them already. Letters the
+    two share at the start and end take no edits and are skipped.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    if end_a == start:
+        return min(end_b - start, limit + 1)
+    if masks is None:
+        masks = letter_masks(a)
+
+    # After the shared start, entries above row start go down by one a row
+    # and entries below it go up by one. Bits past the last row are never
+    # cleared, since nothing carries them back down.
+    last = 1 << (end_a - 1)
+    minus = (1 << start) - 1
+    plus = ~minus
+    distance = end_a - start
+    get = masks.get
+    for letter in b[start:end_b]:
+        equal = get(letter, 0)
+        vertical = equal | minus
+        horizontal = (((equal & plus) + plus) ^ plus) | equal
+        up = minus | ~(horizontal | plus)
+        down = plus & horizontal
+        if up & last:
+            distance += 1
+        elif down & last:
+            distance -= 1
+        up = up << 1 | 1
+        down <<= 1
+        plus = down | ~(vertical | up)
+        minus = up & vertical
+    return min(distance, limit + 1)
+
+
+@lru_cache(maxsize=None)
+def pieces(length, count):
+    """
+    Returns the (start, size) of count nearly equal pieces of a name of
+    the given length, the longer pieces last.
+    """
+    base, extra = divmod(length, count)
+    found = []
+    start = 0
+    for i in range(count):
+        size = base + (i >= count - extra)
+        found.append((start, size))
+        start += size
+    return tuple(found)
+
+
+def cut(entropies, count):
+    """
+    Returns the (start, size) of count pieces of a name whose letters carry
+    the given entropies, each piece at least one letter long and carrying
+    about the same share of the total.
+    """
+    total = sum(entropies)
+    if not total:
+        return pieces(len(entropies), count)
+    found = []
+    start = 0
+    carried = 0.0
+    for number in range(1, count):
+        carried += entropies[start]
+        end = start + 1
+        while (end < len(entropies) - (count - number)
+               and carried < total * number / count):
+            carried += entropies[end]
+            end += 1
+        found.append((start, end - start))
+        start = end
+    found.append((start, len(entropies) - start))
+    return tuple(found)
+
+
+def entropy(counts):
+    """
+    Returns the entropy in bits of the letters counted in counts.
+    """
+    total = sum(counts.values())
+    return -sum(n / total * log2(n / total) for n in counts.values())
+
+
+@lru_cache(maxsize=None)
+def piece_pairs(count):
+    """
+    Returns every (first, second) pair of piece numbers, first < second.
+    """
+    return tuple((first, second) for second in range(count)
+                 for first in range(second))
+
+
+@lru_cache(maxsize=None)
+def shifts(difference, max_distance):
+    """
+    Returns the (first, second) shifts two unbroken pieces can have in a
+    query difference letters longer than the name they come from: it takes
+    at least |first| edits before the first piece, |second - first| between
+    them and |difference - second| after the second.
+    """
+    span = range(-max_distance, max_distance + 1)
+    return tuple((first, second) for first in span for second in span
+                 if abs(first) + abs(second - first)
+                 + abs(difference - second) <= max_distance)
+
+
+def pair_key(first, second, length, number):
+    """
+    Returns the 32-bit hash a pair of pieces of a name is indexed under.
+    """
+    return crc32((first + second).encode("utf-8"), length * 64 + number)
+
+
+def letter_bits(name):
+    """
+    Returns a 31-bit mask of the letters in name. One edit changes at most
+    two bits, so names within d edits differ in at most 2 * d bits.
+    """
+    bits = 0
+    for letter in name:
+        bits |= 1 << ord(letter) % 31
+    return bits
+
+
+class NameIndex():
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.fuzzy_index = dict(graph.fuzzy_index or {})
+
+    @cached_property
+    def names(self):
+        """
+        Lowercase names of people in sorted order.
+        """
+        graph = self.graph
+        return SortedView(graph.person_names, graph.name_order, str.lower)
+
+    def movie_count(self, person):
+        """
+        Returns how many movies a person starred in.
+        """
+        offsets = self.graph.person_offsets
+        return offsets[person + 1] - offsets[person]
+
+    def rank(self, people):
+        """
+        Orders people with the most movies first, then by id.
+        """
+        ids = self.graph.person_ids
+        return sorted(people, key=lambda person: (
+            -self.movie_count(person), ids[person]))
+
+    def _people_at(self, position):
+        """
+        Returns the people whose name is the one at a position in
+        sorted order, plus the position just past them.
+        """
+        name = self.names[position]
+        end = position + 1
+        while end < len(self.names) and self.names[end] == name:
+            end += 1
+        return [self.graph.name_order[i] for i in range(position, end)], end
+
+    def exact(self, name):
+        """
+        Returns everyone with the name, ignoring case, best ranked first.
+        """
+        name = name.lower()
+        position = bisect_left(self.names, name)
+        if position == len(self.names) or self.names[position] != name:
+            return []
+        return self.rank(self._people_at(position)[0])
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to limit people whose name starts with prefix, in
+        alphabetical order, best ranked first among people sharing a name.
+        """
+        prefix = prefix.lower()
+        position = bisect_left(self.names, prefix)
+        found = []
+        while (len(found) < limit and position < len(self.names)
+               and self.names[position].startswith(prefix)):
+            people, position = self._people_at(position)
+            found.extend(self.rank(people))
+        return found[:limit]
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to limit (distance, person) pairs for people whose name
+        is within max_distance edits of name, closest and best ranked first.
+        Names within max_distance - 1 edits are looked for first, which is
+        cheaper, and if there are limit of them no name further off can be
+        among the best. Each round compares at most MAX_CANDIDATES names.
+        """
+        index = self.prepare(max_distance)
+        bits = index[3]
+        name = name.lower()
+        masks = letter_masks(name)
+        name_bits = letter_bits(name)
+        found = []
+        matched = set()
+        for within in range(max(max_distance - 1, 0), max_distance + 1):
+            for position in self._candidates(name, within, max_distance,
+                                             index):
+                if (position in matched or bin(name_bits ^ bits[position])
+                        .count("1") > 2 * within):
+                    continue
+                distance = edit_distance(name, self.names[position], within,
+                                         masks)
+                if distance <= within:
+                    matched.add(position)
+                    for person in self._people_at(position)[0]:
+                        found.append((distance, person))
+            if len(found) >= limit:
+                break
+        ids = self.graph.person_ids
+        found.sort(key=lambda match: (
+            match[0], -self.movie_count(match[1]), ids[match[1]]))
+        return found[:limit]
+
+    def _candidates(self, name, within, max_distance, index):
+        """
+        Returns the positions of up to MAX_CANDIDATES names that may be
+        within `within` edits of name, using the index built for
+        max_distance: names too short to split, then names sharing a pair of
+        unbroken pieces with it, the pairs fewest names share first.
+        """
+        cuts, keys, positions, _, short = index
+        count = max_distance + 2
+        pairs = piece_pairs(count)
+        chosen = set()
+        for length in range(max(count, len(name) - within),
+                            len(name) + within + 1):
+            if length not in cuts:
+                continue
+            spans = cuts[length]
+            moves = shifts(len(name) - length, within)
+
+            # Find the ranges of keys for every pair of pieces at each pair
+            # of shifts they can have.
+            ranges = []
+            for number, (first, second) in enumerate(pairs):
+                start, size = spans[first]
+                later, later_size = spans[second]
+                ranges.append([])
+                for shift, later_shift in moves:
+                    at, later_at = start + shift, later + later_shift
+                    if at < 0 or later_at + later_size > len(name):
+                        continue
+                    key = pair_key(name[at:at + size],
+                                   name[later_at:later_at + later_size],
+                                   length, number)
+                    i = bisect_left(keys, key)
+                    if i < len(keys) and keys[i] == key:
+                        ranges[-1].append((i, bisect_left(keys, key + 1)))
+
+            # With fewer edits than the index allows, a close name keeps at
+            # least three unbroken pieces, so the pairs found in the most
+            # names can be skipped as long as no three pieces have all their
+            # pairs skipped.
+            skipped = set()
+            if within < max_distance:
+                for number in sorted(range(len(pairs)), key=lambda number:
+                                     -sum(j - i for i, j in ranges[number])):
+                    first, second = pairs[number]
+                    if not any(
+                            (min(first, other), max(first, other)) in skipped
+                            and (min(second, other), max(second, other))
+                            in skipped for other in range(count)):
+                        skipped.add(pairs[number])
+            for number, pair in enumerate(pairs):
+                if pair not in skipped:
+                    chosen.update(ranges[number])
+
+        # Names sharing the rarest pairs with name come first, and no more
+        # than MAX_CANDIDATES of them are returned.
+        candidates = {position for position in short
+                      if abs(len(self.names[position]) - len(name)) <= within}
+        for i, j in sorted(chosen, key=lambda span: span[1] - span[0]):
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+            candidates.update(positions[i:min(j, i + MAX_CANDIDATES
+                                              - len(candidates))])
+        return candidates
+
+    def resolve(self, name, max_distance=2):
+        """
+        Returns the best person for a name without asking: the best ranked
+        exact match, or else the closest best ranked near miss, or None.
+        """
+        people = self.exact(name)
+        if people:
+            return people[0]
+        matches = self.fuzzy(name, max_distance, limit=1)
+        return matches[0][1] if matches else None
+
+    def prepare(self, max_distance=2):
+        """
+        Builds the index for fuzzy lookups within max_distance edits, if it
+        has not been built yet (e.g. before forking workers that should
+        share it), and returns it as (cuts, keys, positions, bits, short
+        names): the pieces names of each length are cut into, the sorted
+        keys of every pair of pieces of every distinct name, the position
+        of the name each key came from, the letter_bits of the name at each
+        position, and the positions of names with fewer letters than pieces.
+        """
+        if max_distance in self.fuzzy_index:
+            return self.fuzzy_index[max_distance]
+        count = max_distance + 2
+
+        # Cut the names of each length where their letters carry equal
+        # shares of what tells them apart, measured on a sample, so that
+        # letters most names share ("Person 1", "Person 2"...) do not make
+        # up whole pieces.
+        letters = {}
+        for position in range(0, len(self.names),
+                              max(1, len(self.names) // CUT_SAMPLE)):
+            name = self.names[position]
+            if len(name) >= count:
+                columns = letters.setdefault(
+                    len(name), [Counter() for _ in name])
+                for column, letter in zip(columns, name):
+                    column[letter] += 1
+        cuts = {length: cut([entropy(column) for column in columns], count)
+                for length, columns in letters.items()}
+
+        # Entries are key << 32 | position, kept in 256 buckets by the top
+        # byte of their key so that only one bucket at a time is sorted as
+        # a list of Python ints.
+        buckets = [array("Q") for _ in range(256)]
+        bits = array("i", [0]) * len(self.names)
+        short = array("i")
+        previous = None
+        for position in range(len(self.names)):
+            name = self.names[position]
+            if name == previous:
+                continue
+            previous = name
+            bits[position] = letter_bits(name)
+            if len(name) < count:
+                short.append(position)
+                continue
+            if len(name) not in cuts:
+                cuts[len(name)] = pieces(len(name), count)
+            parts = [name[start:start + size]
+                     for start, size in cuts[len(name)]]
+            for number, (first, second) in enumerate(piece_pairs(count)):
+                key = pair_key(parts[first], parts[second], len(name), number)
+                buckets[key >> 24].append(key << 32 | position)
+        keys = array("I")
+        positions = array("i")
+        for bucket in buckets:
+            entries = sorted(bucket)
+            keys.extend(entry >> 32 for entry in entries)
+            positions.extend(entry & 0xFFFFFFFF for entry in entries)
+        self.fuzzy_index[max_distance] = (cuts, keys, positions, bits, short)
+        return self.fuzzy_index[max_distance]
+
+
+def typo(name, generator):
+    """
+    Returns name with one letter inserted, deleted or replaced at random.
+    """
+    i = generator.randrange(len(name) + 1)
+    edit = generator.randrange(3)
+    if edit == 0 or i == len(name):
+        return name[:i] + generator.choice(TYPO_LETTERS) + name[i:]
+    if edit == 1:
+        return name[:i] + name[i + 1:]
+    return name[:i] + generator.choice(TYPO_LETTERS) + name[i + 1:]
+
+
+def scan(index, name, max_distance):
+    """
+    Returns every (distance, person) pair fuzzy could return for name, by
+    comparing it with every name, closest and best ranked first.
+    """
+    name = name.lower()
+    found = []
+    position = 0
+    while position < len(index.names):
+        people, end = index._people_at(position)
+        distance = edit_distance(name, index.names[position], max_distance)
+        if distance <= max_distance:
+            found.extend((distance, person) for person in people)
+        position = end
+    ids = index.graph.person_ids
+    found.sort(key=lambda match: (
+        match[0], -index.movie_count(match[1]), ids[match[1]]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check typo-tolerant name lookups against a full scan.")
+    parser.add_argument("directory")
+    parser.add_argument("-n", "--queries", type=int, default=200,
+                        help="names to look up, each with up to two typos")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import snapshot
+    graph = snapshot.load(args.directory)
+    if graph is None:
+        graph = Graph.from_csv(args.directory)
+    index = NameIndex(graph)
+    for max_distance in range(3):
+        index.prepare(max_distance)
+    generator = random.Random(args.seed)
+    queries = []
+    for _ in range(args.queries):
+        name = graph.person_names[generator.randrange(len(graph.person_ids))]
+        for _ in range(generator.randrange(3)):
+            name = typo(name, generator)
+        queries.append(name)
+
+    # Every answer must be the start of the scan's, for any distance and
+    # limit, unless the lookup had more than MAX_CANDIDATES names to compare.
+    mismatches = 0
+    times = []
+    for name in queries:
+        for max_distance in range(3):
+            expected = scan(index, name, max_distance)
+            for limit in (1, 3, 10):
+                start = perf_counter()
+                found = index.fuzzy(name, max_distance, limit)
+                times.append(perf_counter() - start)
+                if found != expected[:limit]:
+                    mismatches += 1
+                    print(f"{name!r} within {max_distance}, limit {limit}: "
+                          f"{found} instead of {expected[:limit]}")
+    print(f"{len(times)} lookups; median {statistics.median(times) * 1000:.2f}"
+          f" ms, slowest {max(times) * 1000:.2f} ms")
+    if mismatches:
+        sys.exit(f"{mismatches} lookups differ from the scan")
+    print("Every lookup matches the scan.")
+
+
+if __name__ == "__main__":
+    main()
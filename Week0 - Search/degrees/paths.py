@@ -0,0 +1,204 @@
+"""
+Every shortest path between two people in a compact degrees Graph.
+
+A breadth-first search from the source runs until the target is reached,
+so the distance of everyone closer than the target is known. Walking back
+from the target over co-stars exactly one step closer gives the layered DAG
+of all shortest paths, without building any of them. Paths are then:
+
+    * enumerated lazily by a depth-first walk of the DAG,
+    * counted by summing path counts over it, or
+    * listed best first for an additive per-movie cost, by a best-first walk
+      whose estimate (the cheapest cost left to the source) is exact.
+"""
+import heapq
+
+
+class PathDAG():
+    """
+    Layered DAG of the shortest paths from source to target. For a person p
+    on one of them, predecessors(p) lists the (movie, person) pairs one step
+    closer to the source.
+    """
+
+    def __init__(self, graph, source, target):
+        self.graph = graph
+        self.source = source
+        self.target = target
+        self.distances = self._distances()
+        self.parents = {}
+
+    def _distances(self):
+        """
+        Returns the distance from the source of everyone the breadth-first
+        search reached by the time it found the target, or None if it never
+        does.
+        """
+        distances = {self.source: 0}
+        if self.source == self.target:
+            return distances
+        expanded_movies = set()
+        layer = [self.source]
+        distance = 0
+        while layer:
+            distance += 1
+            next_layer = []
+            for _, _, star in self.graph.expand(layer, expanded_movies):
+                if star not in distances:
+                    distances[star] = distance
+                    next_layer.append(star)
+
+            # Everyone up to the target's layer now has their distance.
+            if self.target in distances:
+                return distances
+            layer = next_layer
+        return None
+
+    @property
+    def connected(self):
+        return self.distances is not None
+
+    @property
+    def length(self):
+        """
+        Number of steps on every shortest path, or None.
+        """
+        return self.distances[self.target] if self.connected else None
+
+    def predecessors(self, person):
+        """
+        Returns the (movie, person) pairs one step closer to the source that
+        a shortest path can reach person from.
+        """
+        parents = self.parents.get(person)
+        if parents is None:
+            graph = self.graph
+            distance = self.distances[person] - 1
+            parents = []
+            for k in range(graph.person_offsets[person],
+                           graph.person_offsets[person + 1]):
+                movie = graph.person_movies[k]
+                for j in range(graph.movie_offsets[movie],
+                               graph.movie_offsets[movie + 1]):
+                    star = graph.movie_stars[j]
+                    if self.distances.get(star) == distance:
+                        parents.append((movie, star))
+            self.parents[person] = parents
+        return parents
+
+    def paths(self):
+        """
+        Yields every shortest path as a list of (movie, person) pairs,
+        building each one only when it is asked for.
+        """
+        if not self.connected:
+            return
+        if self.source == self.target:
+            yield []
+            return
+
+        # Depth-first back from the target, with an iterator over the
+        # predecessors of everyone on the partial path; path holds the steps
+        # taken so far, last step first.
+        path = []
+        stack = [(self.target, iter(self.predecessors(self.target)))]
+        while stack:
+            person, parents = stack[-1]
+            step = next(parents, None)
+            if step is None:
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+            movie, parent = step
+            path.append((movie, person))
+            if parent == self.source:
+                yield path[::-1]
+                path.pop()
+            else:
+                stack.append((parent, iter(self.predecessors(parent))))
+
+    def count(self):
+        """
+        Returns the number of shortest paths without building any of them.
+        """
+        if not self.connected:
+            return 0
+        counts = {self.source: 1}
+        for person in self._topological_order():
+            counts[person] = sum(counts[parent]
+                                 for _, parent in self.predecessors(person))
+        return counts[self.target]
+
+    def _topological_order(self):
+        """
+        Returns the people on shortest paths other than the source,
+        closest to the source first.
+        """
+        layer = [self.target]
+        layers = []
+        seen = {self.target}
+        while layer and layer[0] != self.source:
+            layers.append(layer)
+            previous = []
+            for person in layer:
+                for _, parent in self.predecessors(person):
+                    if parent not in seen:
+                        seen.add(parent)
+                        previous.append(parent)
+            layer = previous
+        return [person for layer in reversed(layers) for person in layer]
+
+    def ranked(self, cost):
+        """
+        Yields shortest paths in increasing order of the summed cost(movie)
+        of their movies, building each one only when it is asked for.
+        """
+        if not self.connected:
+            return
+
+        # Cheapest cost from the source to every person on a shortest path.
+        cheapest = {self.source: 0}
+        for person in self._topological_order():
+            cheapest[person] = min(cheapest[parent] + cost(movie)
+                                   for movie, parent in self.predecessors(person))
+
+        # Best first from the target; a path's entry is (step, rest of path).
+        counter = 0
+        queue = [(cheapest[self.target], counter, 0, self.target, None)]
+        while queue:
+            _, _, spent, person, tail = heapq.heappop(queue)
+            if person == self.source:
+                path = []
+                while tail is not None:
+                    path.append(tail[0])
+                    tail = tail[1]
+                yield path
+                continue
+            for movie, parent in self.predecessors(person):
+                counter += 1
+                step = spent + cost(movie)
+                heapq.heappush(queue, (step + cheapest[parent], counter, step,
+                                       parent, ((movie, person), tail)))
+
+
+def movie_year(graph, movie):
+    """
+    Returns the year of a movie as an int, or 0 if it is unknown.
+    """
+    return graph.release_years[movie]
+
+
+def cast_size(graph, movie):
+    """
+    Returns the number of people who starred in a movie.
+    """
+    return graph.movie_offsets[movie + 1] - graph.movie_offsets[movie]
+
+
+# Per-movie costs for ranking paths, lowest total first
+RANKINGS = {
+    "recent": lambda graph: lambda movie: -movie_year(graph, movie),
+    "oldest": lambda graph: lambda movie: movie_year(graph, movie),
+    "popular": lambda graph: lambda movie: -cast_size(graph, movie)
+}
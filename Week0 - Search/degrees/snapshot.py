@@ -0,0 +1,263 @@
+"""
+Binary snapshots of a loaded degrees Graph.
+
+Compile once with `python snapshot.py directory`; later loads of the same
+directory memory-map the snapshot instead of parsing the CSV files. The
+connected components (see analytics.py) are saved next to it.
+
+File layout (shared with saved trees and analytics, see write and read):
+    8 bytes    magic, b"DEGSNAP2"
+    8 bytes    header length, little-endian
+    header     JSON: source fingerprints, the best-connected people
+               and where each column and fuzzy name index array lives
+    sections   raw array bytes, each starting on an 8 byte boundary
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from graph import Graph, StringTable, report_peak_rss, report_progress
+from nameindex import NameIndex
+
+MAGIC = b"DEGSNAP2"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+FILENAME = "degrees.snapshot"
+
+# Best-connected people whose ranking is stored, so loads need not rank
+RANKED_HUBS = 16
+
+# Edits allowed by the stored fuzzy name index (NameIndex's default), and
+# the arrays that follow its cuts, in the order NameIndex.prepare returns
+# them
+FUZZY_DISTANCE = 2
+FUZZY_ARRAYS = (("keys", "I"), ("positions", "i"), ("bits", "i"),
+                ("short", "i"))
+
+
+def default_path(directory):
+    """
+    Returns where the snapshot of a dataset directory lives by default.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def file_hash(path):
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(directory):
+    """
+    Returns the size, modification time and hash of each source CSV file.
+    """
+    sources = {}
+    for name in SOURCES:
+        path = os.path.join(directory, name)
+        stat = os.stat(path)
+        sources[name] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "sha256": file_hash(path)
+        }
+    return sources
+
+
+def is_fresh(directory, sources):
+    """
+    Checks that the source CSV files still match a snapshot's fingerprint.
+    Size and mtime settle most cases; when only the mtime moved
+    (the files were touched or copied) the contents are hashed.
+    """
+    for name in SOURCES:
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        recorded = sources.get(name)
+        if recorded is None or recorded["size"] != stat.st_size:
+            return False
+        if (recorded["mtime"] != stat.st_mtime_ns
+                and recorded["sha256"] != file_hash(path)):
+            return False
+    return True
+
+
+class Sections():
+    """
+    Buffers to be written one after another, each on an 8 byte boundary.
+    """
+
+    def __init__(self):
+        self.buffers = []
+        self.size = 0
+
+    def place(self, buffer):
+        """
+        Adds a buffer and returns its [offset, size] for the file's header.
+        """
+        self.size += -self.size % 8
+        self.buffers.append((self.size, buffer))
+        section = [self.size, len(buffer)]
+        self.size += len(buffer)
+        return section
+
+
+def write(path, magic, header, sections):
+    """
+    Writes magic, the JSON header and the buffers placed in sections to
+    path. The file is written under a name of its own next to path and
+    renamed into place, so readers and other writers never see half a file.
+    """
+    header = json.dumps(header).encode("utf-8")
+    start = len(magic) + 8 + len(header)
+    start += -start % 8
+    handle, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as f:
+
+            # mkstemp makes the file private; give it the usual permissions.
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temporary, 0o666 & ~umask)
+            f.write(magic)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for offset, buffer in sections.buffers:
+                f.seek(start + offset)
+                f.write(buffer)
+            f.truncate(start + sections.size)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def read(path, magic, directory):
+    """
+    Memory-maps a file written by write and returns its header and a
+    function of a section's (offset, size) returning its bytes, or None if
+    there is no such file or the dataset in directory has changed since.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        if f.read(len(magic)) != magic:
+            return None
+        length, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+        if not is_fresh(directory, header["sources"]):
+            return None
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    start = len(magic) + 8 + length
+    start += -start % 8
+    view = memoryview(data)
+
+    def section(offset, size):
+        if start + offset + size > len(view):
+            raise Exception(f"{path} is shorter than its header says")
+        return view[start + offset:start + offset + size]
+
+    return header, section
+
+
+def compile(directory, path=None, graph=None, progress=None):
+    """
+    Writes a snapshot of the dataset in directory and returns its path.
+    The graph is built from the CSV files unless one is given.
+    """
+    if path is None:
+        path = default_path(directory)
+    sources = fingerprint(directory)
+    if graph is None:
+        graph = Graph.from_csv(directory, progress)
+
+    columns = {}
+    sections = Sections()
+    for column in Graph.COLUMNS:
+        value = getattr(graph, column)
+        if isinstance(value, StringTable):
+            columns[column] = {
+                "strings": sections.place(bytes(value.data)),
+                "offsets": sections.place(array("i", value.offsets).tobytes())
+            }
+        else:
+            columns[column] = {
+                "array": sections.place(array("i", value).tobytes())}
+
+    cuts, *built = NameIndex(graph).prepare(FUZZY_DISTANCE)
+    fuzzy = {"distance": FUZZY_DISTANCE, "cuts": sorted(cuts.items())}
+    for (name, _), values in zip(FUZZY_ARRAYS, built):
+        fuzzy[name] = sections.place(values.tobytes())
+
+    write(path, MAGIC, {
+        "sources": sources, "hubs": graph.hubs(RANKED_HUBS),
+        "columns": columns, "fuzzy": fuzzy
+    }, sections)
+    return path
+
+
+def load(directory, path=None):
+    """
+    Memory-maps the snapshot of the dataset in directory and returns it as a
+    Graph, or returns None if there is no snapshot or its sources changed.
+    """
+    if path is None:
+        path = default_path(directory)
+    found = read(path, MAGIC, directory)
+    if found is None:
+        return None
+    header, section = found
+
+    columns = {}
+    for column, sections in header["columns"].items():
+        if "strings" in sections:
+            columns[column] = StringTable(
+                section(*sections["strings"]),
+                section(*sections["offsets"]).cast("i"))
+        else:
+            columns[column] = section(*sections["array"]).cast("i")
+    fuzzy = None
+    if "fuzzy" in header:
+        sections = header["fuzzy"]
+        cuts = {length: tuple(map(tuple, spans))
+                for length, spans in sections["cuts"]}
+        fuzzy = {sections["distance"]: (cuts, *(
+            section(*sections[name]).cast(code)
+            for name, code in FUZZY_ARRAYS))}
+    return Graph(hubs=header.get("hubs"), fuzzy=fuzzy, **columns)
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python snapshot.py directory [snapshot]")
+    directory = sys.argv[1]
+    path = sys.argv[2] if len(sys.argv) == 3 else None
+    print(f"Compiling {directory}...")
+    path = compile(directory, path, progress=report_progress)
+    print(f"Snapshot written to {path}.")
+
+    # Components are saved now rather than by loads, which only write to
+    # the dataset directory when asked to.
+    import analytics
+    analytics.load_or_compute(load(directory, path), directory, persist=True)
+    report_peak_rss()
+
+
+if __name__ == "__main__":
+    main()
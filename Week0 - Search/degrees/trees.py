@@ -0,0 +1,247 @@
+"""
+Shortest-path trees for people who are asked about often.
+
+One breadth-first search from a person records the parent and distance of
+everyone reachable, after which any path from (or to) that person is read
+off the tree in O(path length). A TreeCache keeps the most recently used
+trees, can store them next to the dataset, and knows a few "hub" people
+with the most co-stars, whose trees it builds the first time they are
+asked about (or up front, with precompute_hubs).
+"""
+import os
+from array import array
+from collections import OrderedDict
+
+import snapshot
+from snapshot import Sections
+
+MAGIC = b"DEGTREE2"
+
+# The arrays of a SourceTree and their type codes, as they are saved
+ARRAYS = (("parent_people", "i"), ("parent_movies", "i"), ("distances", "h"))
+
+
+class SourceTree():
+    """
+    Breadth-first tree of everyone reachable from source. For a reached
+    person p, parent_people[p] and parent_movies[p] are the previous person
+    and movie on a shortest path and distances[p] is its length; all three
+    are -1 for people who cannot be reached.
+    """
+
+    def __init__(self, source, parent_people, parent_movies, distances):
+        self.source = source
+        self.parent_people = parent_people
+        self.parent_movies = parent_movies
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, source, stats=None):
+        """
+        Runs one breadth-first search over the whole graph from source.
+        If stats is a util.SearchStats, the search records what it did in it.
+        """
+        size = len(graph.person_ids)
+        parent_people = array("i", [-1]) * size
+        parent_movies = array("i", [-1]) * size
+        distances = array("h", [-1]) * size
+        parent_people[source] = source
+        distances[source] = 0
+
+        expanded_movies = set()
+        layer = [source]
+        distance = 0
+        while layer:
+            distance += 1
+            next_layer = []
+            for person, movie, star in graph.expand(layer, expanded_movies):
+                if distances[star] < 0:
+                    parent_people[star] = person
+                    parent_movies[star] = movie
+                    distances[star] = distance
+                    next_layer.append(star)
+            if stats is not None:
+                stats.nodes_expanded += len(layer)
+                stats.frontier_size(len(next_layer))
+                stats.end_layer()
+            layer = next_layer
+        return cls(source, parent_people, parent_movies, distances)
+
+    def path_to(self, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        from the tree's source to target, or None.
+        """
+        if self.distances[target] < 0:
+            return None
+        path = []
+        person = target
+        while person != self.source:
+            path.append((self.parent_movies[person], person))
+            person = self.parent_people[person]
+        path.reverse()
+        return path
+
+    def path_from(self, person):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        from person to the tree's source, or None.
+        """
+        if self.distances[person] < 0:
+            return None
+        path = []
+        while person != self.source:
+            path.append((self.parent_movies[person], self.parent_people[person]))
+            person = self.parent_people[person]
+        return path
+
+    def save(self, path, sources):
+        """
+        Writes the tree to path, tagged with the fingerprint of the
+        source CSV files it was computed from.
+        """
+        sections = Sections()
+        snapshot.write(path, MAGIC, {
+            "source": self.source, "sources": sources,
+            "sections": {name: sections.place(getattr(self, name).tobytes())
+                         for name, _ in ARRAYS}
+        }, sections)
+
+    @classmethod
+    def load(cls, path, directory, size):
+        """
+        Memory-maps a saved tree of a graph with size people, or returns None
+        if there is none or the dataset in directory has changed since.
+        """
+        found = snapshot.read(path, MAGIC, directory)
+        if found is None:
+            return None
+        header, section = found
+        arrays = [section(*header["sections"][name]).cast(code)
+                  for name, code in ARRAYS]
+        if any(len(values) != size for values in arrays):
+            return None
+        return cls(header["source"], *arrays)
+
+
+class TreeCache():
+    """
+    Least-recently-used cache of SourceTrees for one graph. If a dataset
+    directory is given, trees are also saved to and loaded from its
+    "trees" folder.
+    """
+
+    def __init__(self, graph, capacity=8, directory=None):
+        self.graph = graph
+        self.capacity = capacity
+        self.directory = directory
+        self.trees = OrderedDict()
+        self.sources = None
+        self.hubs = set()
+
+    def tree(self, source, stats=None):
+        """
+        Returns the tree of source, computing it if it is not cached (as the
+        "tree-build" engine in stats, if given).
+        """
+        tree = self.cached(source)
+        if tree is None:
+            tree = self._load(source)
+            if tree is None:
+                if stats is not None:
+                    stats.engine = "tree-build"
+                tree = SourceTree.build(self.graph, source, stats)
+                self._save(tree)
+            self._remember(tree)
+        return tree
+
+    def cached(self, person):
+        """
+        Returns the tree of person if it is cached, or None.
+        """
+        tree = self.trees.get(person)
+        if tree is not None:
+            self.trees.move_to_end(person)
+        return tree
+
+    def shortest_path(self, source, target, bidirectional=False, stats=None,
+                      movies=None):
+        """
+        Returns the shortest list of (movie, person) index pairs from source
+        to target, read off a cached tree of either person if there is one
+        and searched for otherwise. Trees span every movie, so a search
+        restricted by a movies predicate always searches. In stats, reading
+        a tree is the "tree" engine, and building a hub's tree first is the
+        "tree-build" engine, with the layers of its search.
+        """
+        if movies is not None:
+            if bidirectional:
+                return self.graph.bidirectional_shortest_path(
+                    source, target, stats, movies)
+            return self.graph.shortest_path(source, target, stats, movies)
+        tree = self._hub_tree(source, stats)
+        if tree is not None:
+            return tree.path_to(target)
+        tree = self._hub_tree(target, stats)
+        if tree is not None:
+            return tree.path_from(source)
+        if bidirectional:
+            return self.graph.bidirectional_shortest_path(
+                source, target, stats)
+        return self.graph.shortest_path(source, target, stats)
+
+    def mark_hubs(self, count):
+        """
+        Makes the count best-connected people hubs, whose trees are built
+        (or loaded) the first time a path from or to them is asked for.
+        """
+        self.hubs = set(self.graph.hubs(min(count, self.capacity)))
+
+    def precompute_hubs(self, count):
+        """
+        Computes (or loads) the trees of the count best-connected people
+        now, e.g. before forking workers that should all share them.
+        """
+        self.mark_hubs(count)
+        for hub in self.hubs:
+            self.tree(hub)
+
+    def _hub_tree(self, person, stats=None):
+        """
+        Returns the cached tree of person, building it first for a hub,
+        and records in stats which it did.
+        """
+        tree = self.cached(person)
+        if tree is None and person not in self.hubs:
+            return None
+        if stats is not None:
+            stats.engine = "tree"
+        return tree if tree is not None else self.tree(person, stats)
+
+    def _remember(self, tree):
+        self.trees[tree.source] = tree
+        while len(self.trees) > self.capacity:
+            self.trees.popitem(last=False)
+
+    def _path(self, source):
+        person_id = self.graph.person_ids[source]
+        return os.path.join(self.directory, "trees", f"{person_id}.tree")
+
+    def _load(self, source):
+        if self.directory is None:
+            return None
+        return SourceTree.load(
+            self._path(source), self.directory, len(self.graph.person_ids))
+
+    def _save(self, tree):
+        if self.directory is None:
+            return
+        if self.sources is None:
+            self.sources = snapshot.fingerprint(self.directory)
+
+        # A tree that cannot be written is just not kept for later runs.
+        try:
+            os.makedirs(os.path.join(self.directory, "trees"), exist_ok=True)
+            tree.save(self._path(tree.source), self.sources)
+        except OSError:
+            pass
@@ -1,8 +1,14 @@
+import json
+from collections import deque
+from time import perf_counter
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
         self.action = action
+        self.depth = 0 if parent is None else parent.depth + 1
 
 
 class StackFrontier():
@@ -36,3 +42,118 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class FastStackFrontier():
+    """
+    Drop-in StackFrontier with constant-time add, remove and contains_state.
+    Nodes live in a deque and their states are counted in a dict alongside.
+    If given a SearchStats, it records the peak size of the frontier.
+    """
+    def __init__(self, stats=None):
+        self.frontier = deque()
+        self.states = {}
+        self.stats = stats
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+        if self.stats is not None:
+            self.stats.frontier_size(len(self.frontier))
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.discard(node.state)
+            return node
+
+    def discard(self, state):
+        """Forgets one node with the given state once it leaves the frontier."""
+        count = self.states[state]
+        if count == 1:
+            del self.states[state]
+        else:
+            self.states[state] = count - 1
+
+
+class FastQueueFrontier(FastStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.discard(node.state)
+            return node
+
+
+class SearchStats():
+    """
+    Record of what one search did, filled in by the searches and frontiers
+    it is passed to. Times are in seconds; neighbor_time only covers the
+    searches that ask a neighbors function for each node.
+    """
+    def __init__(self):
+        self.engine = None
+        self.nodes_expanded = 0
+        self.frontier_peak = 0
+        self.neighbor_time = 0.0
+        self.layer_times = []
+        self.total_time = 0.0
+        self.degrees = None
+        self.started = self.mark = None
+        self.closed = 0
+
+    def start(self):
+        self.started = self.mark = perf_counter()
+
+    def end_layer(self):
+        """Records the time taken since the previous layer ended."""
+        now = perf_counter()
+        self.layer_times.append(now - self.mark)
+        self.mark = now
+        self.closed = self.nodes_expanded
+
+    def finish(self, path):
+        """Closes any unfinished layer and records the outcome."""
+        if self.nodes_expanded > self.closed:
+            self.end_layer()
+        self.total_time = perf_counter() - self.started
+        self.degrees = None if path is None else len(path)
+
+    def frontier_size(self, size):
+        if size > self.frontier_peak:
+            self.frontier_peak = size
+
+    def timed(self, neighbors):
+        """Wraps a neighbors function so its time counts as neighbor_time."""
+        def timed_neighbors(state):
+            start = perf_counter()
+            result = neighbors(state)
+            self.neighbor_time += perf_counter() - start
+            return result
+        return timed_neighbors
+
+    def as_dict(self):
+        return {
+            "engine": self.engine,
+            "degrees": self.degrees,
+            "nodes_expanded": self.nodes_expanded,
+            "frontier_peak": self.frontier_peak,
+            "layers": len(self.layer_times),
+            "layer_times": self.layer_times,
+            "neighbor_time": self.neighbor_time,
+            "total_time": self.total_time
+        }
+
+    def write(self, f, **fields):
+        """Writes the stats, after any extra fields, as one JSON line to f."""
+        f.write(json.dumps({**fields, **self.as_dict()}) + "\n")
@@ -0,0 +1,182 @@
+"""
+Count the nodes each tictactoe search visits to pick the first move and to
+play a whole game against itself, starting with empty tables.
+
+"minimax" is the plain search tictactoe.py used before alpha-beta, kept
+here as the reference the others are measured against: MAXV and MINV
+value a bitboard state, optionally remembering values in a table keyed by
+bitboard.canonical(state), which is the same for all 8 rotations and
+reflections of a position.
+"""
+import argparse
+import math
+from time import perf_counter
+
+import bitboard
+from search import AlphaBeta
+
+
+class Counting():
+    """
+    Wraps a game and counts the states it is asked to test for the end of
+    the game, which every search does exactly once per node.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.nodes = 0
+
+    def __getattr__(self, name):
+        return getattr(self.game, name)
+
+    def terminal(self, state):
+        self.nodes += 1
+        return self.game.terminal(state)
+
+
+class NoTable(dict):
+    """
+    Transposition table that never remembers anything.
+    """
+
+    def __setitem__(self, key, value):
+        pass
+
+
+def MAXV(state, game, table):
+    """
+    Returns the maximum value at that state, playing by the functions of
+    game and remembering values in table.
+    """
+    # If the game is over, the only possible value
+    # will be the value at that state.
+    if game.terminal(state):
+        return game.utility(state)
+
+    # A position solved before, in any orientation, is not searched again.
+    key = game.canonical(state)
+    if key in table:
+        return table[key]
+
+    # Initializing v as the minimum possible value.
+    v = -math.inf
+
+    # Iterates through all the actions in state and
+    # checks for the maximum value recursively.
+    for cell in game.actions(state):
+        v = max(v, MINV(game.result(state, cell), game, table))
+
+        # In this game, the maximum value is 1.
+        if v == 1:
+            break
+
+    table[key] = v
+    return v
+
+
+def MINV(state, game, table):
+    """
+    Returns the minimum value at that state, playing by the functions of
+    game and remembering values in table.
+    """
+    # If the game is over, the only possible value will be
+    # the value at that state
+    if game.terminal(state):
+        return game.utility(state)
+
+    # A position solved before, in any orientation, is not searched again.
+    key = game.canonical(state)
+    if key in table:
+        return table[key]
+
+    # Initializing v as the maximum possible value.
+    v = math.inf
+
+    # Iterates through all the actions in state and
+    # checks for the minimum value recursively.
+    for cell in game.actions(state):
+        v = min(v, MAXV(game.result(state, cell), game, table))
+
+        # In this game, the minimum value is -1.
+        if v == -1:
+            break
+
+    table[key] = v
+    return v
+
+
+def plain_action(state, game, table):
+    """
+    Picks a move the way minimax did before alpha-beta, from the MAXV or
+    MINV value of every action.
+    """
+    if game.player(state) == bitboard.X:
+        best = max(game.actions(state), key=lambda cell: MINV(
+            game.result(state, cell), game, table))
+    else:
+        best = min(game.actions(state), key=lambda cell: MAXV(
+            game.result(state, cell), game, table))
+    return best
+
+
+def plain(table):
+    """
+    Returns (game, choose) for MAXV/MINV with a fresh table of the given type.
+    """
+    game = Counting(bitboard)
+    return game, lambda state: plain_action(state, game, table)
+
+
+def alphabeta(transpositions):
+    """
+    Returns (game, choose) for a fresh alpha-beta search.
+    """
+    game = Counting(bitboard)
+    engine = AlphaBeta(game, bounds=(-1, 1), transpositions=transpositions)
+    return game, engine.best_action
+
+
+ENGINES = {
+    "minimax": lambda: plain(NoTable()),
+    "minimax + table": lambda: plain({}),
+    "alpha-beta": lambda: alphabeta(False),
+    "alpha-beta + table": lambda: alphabeta(True)
+}
+
+
+def measure(make):
+    """
+    Returns (nodes, seconds) for the first move from an empty board and
+    for a whole game of perfect play, each with fresh tables.
+    """
+    game, choose = make()
+    start = perf_counter()
+    choose(bitboard.initial_state())
+    first = (game.nodes, perf_counter() - start)
+
+    game, choose = make()
+    state = bitboard.initial_state()
+    start = perf_counter()
+    while not bitboard.terminal(state):
+        state = bitboard.result(state, choose(state))
+    if bitboard.winner(state) is not None:
+        raise Exception("perfect play did not end in a draw")
+    return first, (game.nodes, perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("engines", nargs="*", default=list(ENGINES),
+                        help=f"any of: {', '.join(ENGINES)}")
+    args = parser.parse_args()
+
+    print(f"{'engine':>20} {'first move nodes':>17} {'s':>8} "
+          f"{'game nodes':>11} {'s':>8}")
+    for name in args.engines:
+        (nodes, elapsed), (game_nodes, game_elapsed) = measure(ENGINES[name])
+        print(f"{name:>20} {nodes:>17} {elapsed:>8.4f} "
+              f"{game_nodes:>11} {game_elapsed:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Tic Tac Toe on bitboards.
+
+A state is a pair (x, o) of 9-bit ints: bit 3 * i + j of x is set if X has
+played cell (i, j), and likewise for o. Everything that only depends on one
+side's bits (how many moves, whether they complete a line, which cells are
+still free, the board under each symmetry) is looked up in a table over all
+512 bit patterns, so each game function is a few integer operations.
+"""
+
+X = "X"
+O = "O"
+
+# All nine cells
+FULL = (1 << 9) - 1
+
+# Bits of the three rows, three columns and two diagonals
+WINS = (
+    [0b111 << 3 * i for i in range(3)]
+    + [0b1001001 << j for j in range(3)]
+    + [0b100010001, 0b001010100]
+)
+
+# Number of cells set in each pattern
+COUNTS = bytes(bin(bits).count("1") for bits in range(FULL + 1))
+
+# Whether each pattern contains a whole line
+WON = bytes(any(bits & win == win for win in WINS) for bits in range(FULL + 1))
+
+# Cells in the order moves are tried: center, corners, then edges, since
+# that is roughly how many lines each of them is on
+ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Free cells of every occupied pattern, in ORDER
+MOVES = [tuple(cell for cell in ORDER if not bits >> cell & 1)
+         for bits in range(FULL + 1)]
+
+# Each pattern under the 8 rotations and reflections of the board
+TRANSFORMS = (
+    lambda i, j: (i, j), lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j), lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j), lambda i, j: (2 - i, j),
+    lambda i, j: (j, i), lambda i, j: (2 - j, 2 - i)
+)
+CELL_MAPS = [
+    [3 * a + b for a, b in (transform(*divmod(cell, 3)) for cell in range(9))]
+    for transform in TRANSFORMS
+]
+SYMMETRIES = [
+    [sum(1 << cells[cell] for cell in range(9) if bits >> cell & 1)
+     for bits in range(FULL + 1)]
+    for cells in CELL_MAPS
+]
+
+
+def initial_state():
+    """
+    Returns the empty board.
+    """
+    return (0, 0)
+
+
+def player(state):
+    """
+    Returns the player who has the next turn.
+    """
+    x, o = state
+    return X if COUNTS[x] == COUNTS[o] else O
+
+
+def actions(state):
+    """
+    Returns the free cells (0 to 8), center first, then corners.
+    """
+    x, o = state
+    return MOVES[x | o]
+
+
+def result(state, cell):
+    """
+    Returns the state after the player to move plays cell.
+    """
+    x, o = state
+    bit = 1 << cell
+    if (x | o) & bit or WON[x] or WON[o]:
+        raise Exception("Invalid Move.")
+    if COUNTS[x] == COUNTS[o]:
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = state
+    if WON[x]:
+        return X
+    if WON[o]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = state
+    return bool(WON[x] or WON[o]) or x | o == FULL
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = state
+    return WON[x] - WON[o]
+
+
+def canonical(state):
+    """
+    Returns the same 18-bit key for a state and all of its rotations and
+    reflections, which all have the same value.
+    """
+    x, o = state
+    return min(symmetry[x] << 9 | symmetry[o] for symmetry in SYMMETRIES)
+
+
+def orientation(state):
+    """
+    Returns the index into SYMMETRIES of the symmetry that turns state into
+    its canonical form; cell c of state is cell CELL_MAPS[index][c] there.
+    """
+    x, o = state
+    return min(range(len(SYMMETRIES)), key=lambda index: (
+        SYMMETRIES[index][x] << 9 | SYMMETRIES[index][o]))
+
+
+def transform(state, index):
+    """
+    Returns state under the symmetry SYMMETRIES[index].
+    """
+    x, o = state
+    return (SYMMETRIES[index][x], SYMMETRIES[index][o])
+
+
+def from_board(board):
+    """
+    Converts a list-of-lists board of X, O and None into a state.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << 3 * i + j
+            elif board[i][j] == O:
+                o |= 1 << 3 * i + j
+    return (x, o)
+
+
+def to_board(state):
+    """
+    Converts a state into a list-of-lists board of X, O and None.
+    """
+    x, o = state
+    return [[X if x >> 3 * i + j & 1 else O if o >> 3 * i + j & 1 else None
+             for j in range(3)] for i in range(3)]
+
+
+def to_action(cell):
+    """
+    Converts a cell number into an (i, j) action.
+    """
+    return divmod(cell, 3)
+
+
+def to_cell(action):
+    """
+    Converts an (i, j) action into a cell number.
+    """
+    i, j = action
+    return 3 * i + j
@@ -0,0 +1,159 @@
+"""
+Opening book: the solved value and best move of every tictactoe position.
+
+There are only 5,478 legal positions (627 unfinished ones up to symmetry),
+so they are all solved once by `python book.py` and written to book.bin.
+The file holds one byte per board, indexed by reading the board as a base-3
+number (empty, X, O per cell); only canonical boards are filled in, with the
+value + 1 in the high nibble and the best cell (in canonical orientation) in
+the low one.
+
+The file is memory-mapped the first time a move is looked up, so reading a
+move costs a few table lookups and no search at all.
+"""
+
+import mmap
+import os
+import sys
+
+import bitboard
+from search import AlphaBeta
+
+MAGIC = b"TTTBOOK1"
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Boards that can be written down, legal or not
+SIZE = 3 ** 9
+
+# Byte of a board that is not in the book
+MISSING = 0xFF
+
+# Base-3 weight of every 9-bit pattern: TERNARY[x] + 2 * TERNARY[o] numbers
+# the board (x, o)
+TERNARY = [sum(3 ** cell for cell in range(9) if bits >> cell & 1)
+           for bits in range(bitboard.FULL + 1)]
+
+# Where every cell of the canonical board came from, for each symmetry
+INVERSE = [[cells.index(cell) for cell in range(9)]
+           for cells in bitboard.CELL_MAPS]
+
+# Book as a memory-mapped file, once loaded; False if there is none
+_book = None
+
+
+def index(state):
+    """
+    Returns the position of a board in the book.
+    """
+    x, o = state
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def positions():
+    """
+    Returns every position reachable from the empty board.
+    """
+    seen = set()
+    stack = [bitboard.initial_state()]
+    while stack:
+        state = stack.pop()
+        if state in seen:
+            continue
+        seen.add(state)
+        if not bitboard.terminal(state):
+            for cell in bitboard.actions(state):
+                stack.append(bitboard.result(state, cell))
+    return seen
+
+
+def build(path=PATH):
+    """
+    Solves every reachable position that is not over and writes the book.
+    Returns the number of canonical positions in it.
+    """
+    engine = AlphaBeta(bitboard, bounds=(-1, 1))
+    table = bytearray([MISSING]) * SIZE
+    count = 0
+    for state in positions():
+        if bitboard.terminal(state):
+            continue
+        canonical = bitboard.transform(state, bitboard.orientation(state))
+        if table[index(canonical)] != MISSING:
+            continue
+        value = engine.value(canonical)
+        cell = engine.best_action(canonical)
+        table[index(canonical)] = (value + 1) << 4 | cell
+        count += 1
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(table)
+    os.replace(temporary, path)
+    return count
+
+
+def load(path=PATH):
+    """
+    Memory-maps the book, or returns None if it has not been built.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        if os.fstat(f.fileno()).st_size != len(MAGIC) + SIZE:
+            return None
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(data)[len(MAGIC):]
+
+
+def entry(state):
+    """
+    Returns the book's byte for state in canonical orientation, and the
+    symmetry that orients it, or (None, None) if the book does not have it.
+    """
+    global _book
+    if _book is None:
+        _book = load() or False
+    if not _book:
+        return None, None
+    symmetry = bitboard.orientation(state)
+    byte = _book[index(bitboard.transform(state, symmetry))]
+    if byte == MISSING:
+        return None, None
+    return byte, symmetry
+
+
+def move(state):
+    """
+    Returns the book's best cell for state, or None if it has none.
+    """
+    byte, symmetry = entry(state)
+    if byte is None:
+        return None
+    return INVERSE[symmetry][byte & 0xF]
+
+
+def value(state):
+    """
+    Returns the book's value of state (1, 0 or -1), or None if it has none.
+    """
+    byte, _ = entry(state)
+    if byte is None:
+        return None
+    return (byte >> 4) - 1
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [book]")
+    path = sys.argv[1] if len(sys.argv) == 2 else PATH
+    count = build(path)
+    print(f"Wrote {count} positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Monte Carlo tree search (UCT) player for any game search.AlphaBeta can play,
+or the list-of-lists board functions of tictactoe.py.
+
+Every iteration walks down the tree picking the child with the best upper
+confidence bound, adds one new child, plays random moves from it to the end
+of the game and credits the result to every node on the way back up. The
+move played is the root's most visited child.
+
+With several processes the search is root-parallel: each process grows its
+own tree from the same position with its own random seed, and the visit
+counts of their root children are added up before picking the move.
+
+Usage: python mcts.py [rows columns k] [--budgets seconds...] [-n games]
+(plays MCTS against alpha-beta with the same time per move)
+"""
+
+import argparse
+import importlib
+import math
+import random
+import types
+from multiprocessing import Pool
+from time import perf_counter
+
+import bitboard
+from mnk import MNKGame
+from search import AlphaBeta
+
+# Iterations per move when no budget is given
+ITERATIONS = 1000
+
+
+class Node():
+    """
+    Node of a search tree. Nodes only know their children (the way back up
+    is kept on the stack of each iteration), so a tree holds no reference
+    cycles and is freed as soon as its search is done.
+    """
+
+    def __init__(self, state, action, mover, actions):
+        self.state = state
+        self.action = action
+        self.mover = mover
+        self.untried = list(actions)
+        self.children = []
+        self.visits = 0
+        self.reward = 0.0
+
+
+class MCTS():
+    """
+    UCT search over a game. exploration weighs trying rarely visited moves
+    against replaying good ones; iterations counts the playouts of the last
+    move searched for.
+    """
+
+    def __init__(self, game, exploration=math.sqrt(2), seed=None, processes=1):
+        self.game = game
+        self.exploration = exploration
+        self.generator = random.Random(seed)
+        self.maximizer = game.player(game.initial_state())
+        self.processes = processes
+        self.pool = None
+        self.iterations = 0
+
+    def statistics(self, state, iterations=None, budget=None):
+        """
+        Grows a tree from state for the given number of iterations or
+        seconds (ITERATIONS if neither is given) and returns the visits
+        and total reward of every root action, as a dictionary. At least
+        one iteration always runs, so some action is always found.
+        """
+        game = self.game
+        generator = self.generator
+        if iterations is None and budget is None:
+            iterations = ITERATIONS
+        deadline = None if budget is None else perf_counter() + budget
+        root = Node(state, None, None, game.actions(state))
+        count = 0
+        while True:
+
+            # Select: follow the best bound down to a node with untried moves,
+            # keeping the way there for the back up.
+            node = root
+            path = [root]
+            while not node.untried and node.children:
+                logarithm = math.log(node.visits)
+                node = max(node.children, key=lambda child: (
+                    child.reward / child.visits + self.exploration
+                    * math.sqrt(logarithm / child.visits)))
+                path.append(node)
+
+            # Expand: try one of its moves.
+            if node.untried:
+                action = node.untried.pop(
+                    generator.randrange(len(node.untried)))
+                child = game.result(node.state, action)
+                node.children.append(Node(
+                    child, action, game.player(node.state),
+                    () if game.terminal(child) else game.actions(child)))
+                node = node.children[-1]
+                path.append(node)
+
+            # Simulate: play at random to the end of the game (actions may
+            # come as a set, as from tictactoe.py, so make them a sequence).
+            playout = node.state
+            while not game.terminal(playout):
+                playout = game.result(playout, generator.choice(
+                    tuple(game.actions(playout))))
+            utility = game.utility(playout)
+
+            # Back up: each node scores the result for whoever moved into it.
+            for node in path:
+                node.visits += 1
+                if node.mover is not None:
+                    if node.mover == self.maximizer:
+                        node.reward += (1 + utility) / 2
+                    else:
+                        node.reward += (1 - utility) / 2
+            count += 1
+
+            if ((iterations is not None and count >= iterations)
+                    or (deadline is not None and perf_counter() >= deadline)):
+                break
+
+        self.iterations = count
+        return {child.action: (child.visits, child.reward)
+                for child in root.children}
+
+    def best_action(self, state, iterations=None, budget=None):
+        """
+        Returns the most visited action at the root after searching state
+        (in every process), or None if the game is over.
+        """
+        if self.game.terminal(state):
+            return None
+        if self.processes == 1:
+            totals = self.statistics(state, iterations, budget)
+        else:
+            if self.pool is None:
+                self.pool = Pool(self.processes)
+            seeds = [self.generator.randrange(2 ** 32)
+                     for _ in range(self.processes)]
+            jobs = [(portable(self.game), self.exploration, seed, state,
+                     iterations, budget) for seed in seeds]
+            totals = {}
+            self.iterations = 0
+            for actions, count in self.pool.map(search_tree, jobs):
+                self.iterations += count
+                for action, (visits, reward) in actions.items():
+                    total = totals.get(action, (0, 0.0))
+                    totals[action] = (total[0] + visits, total[1] + reward)
+        return max(totals, key=lambda action: totals[action][0])
+
+    def close(self):
+        """
+        Stops the worker processes, if any were started.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+def portable(game):
+    """
+    Returns something that can be sent to a worker process for a game:
+    the name of a game module, or the game object itself.
+    """
+    if isinstance(game, types.ModuleType):
+        return game.__name__
+    return game
+
+
+def search_tree(job):
+    """
+    Grows one tree in a worker process and returns its root statistics
+    and iterations.
+    """
+    game, exploration, seed, state, iterations, budget = job
+    if isinstance(game, str):
+        game = importlib.import_module(game)
+    player = MCTS(game, exploration, seed)
+    actions = player.statistics(state, iterations, budget)
+    return actions, player.iterations
+
+
+def play(game, players, budget):
+    """
+    Plays one game between the X and O players (an MCTS or an AlphaBeta),
+    each with budget seconds per move, and returns the winner and the
+    moves, seconds and iterations of the MCTS player.
+    """
+    state = game.initial_state()
+    spent = [0, 0.0, 0]
+    while not game.terminal(state):
+        player = players[game.player(state)]
+        if isinstance(player, MCTS):
+            start = perf_counter()
+            action = player.best_action(state, budget=budget)
+            spent[0] += 1
+            spent[1] += perf_counter() - start
+            spent[2] += player.iterations
+        else:
+            action = player.search(state, budget)
+        state = game.result(state, action)
+    return game.winner(state), spent
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="MCTS against alpha-beta at equal time per move.")
+    parser.add_argument("shape", nargs="*", type=int, default=[3, 3, 3],
+                        help="rows, columns and k")
+    parser.add_argument("--budgets", nargs="+", type=float,
+                        default=[0.0002, 0.001, 0.01, 0.05],
+                        help="seconds per move")
+    parser.add_argument("-n", "--games", type=int, default=10,
+                        help="games per budget, half of them as X")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                        help="processes for root-parallel MCTS")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if len(args.shape) != 3:
+        parser.error("give rows, columns and k")
+    game = bitboard if args.shape == [3, 3, 3] else MNKGame(*args.shape)
+
+    player = MCTS(game, seed=args.seed, processes=args.processes)
+    print(f"{'budget':>8} {'MCTS wins':>10} {'draws':>6} {'losses':>7} "
+          f"{'s/move':>8} {'iterations/s':>13}")
+    try:
+        for budget in args.budgets:
+            counts = {"win": 0, "draw": 0, "loss": 0}
+            moves = seconds = iterations = 0
+            for n in range(args.games):
+
+                # MCTS plays X in even games and O in odd ones.
+                opponent = AlphaBeta(game, bounds=(-1, 1))
+                if n % 2 == 0:
+                    players = {bitboard.X: player, bitboard.O: opponent}
+                else:
+                    players = {bitboard.X: opponent, bitboard.O: player}
+                winner, (count, spent, done) = play(game, players, budget)
+                moves += count
+                seconds += spent
+                iterations += done
+                if winner is None:
+                    counts["draw"] += 1
+                elif players[winner] is player:
+                    counts["win"] += 1
+                else:
+                    counts["loss"] += 1
+            print(f"{budget:>8} {counts['win']:>10} {counts['draw']:>6} "
+                  f"{counts['loss']:>7} {seconds / max(moves, 1):>8.3f} "
+                  f"{iterations / max(seconds, 1e-9):>13.0f}")
+    finally:
+        player.close()
+
+
+if __name__ == "__main__":
+    main()
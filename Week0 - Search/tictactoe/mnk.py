@@ -0,0 +1,181 @@
+"""
+m,n,k-games: tictactoe on a board of any number of rows and columns, won by
+the first player to get k of their marks in a row, column or diagonal.
+
+States are (x, o) pairs of ints with bit columns * i + j set where X (or O)
+has played cell (i, j), as in bitboard.py, and every line of k cells is a
+precomputed mask. An MNKGame provides the game functions search.AlphaBeta
+expects, plus evaluate(), a heuristic for positions it cannot search to the
+end: lines only one player can still complete count for that player, more
+the fuller they are.
+
+Usage: python mnk.py [rows columns k] [--budget seconds]
+(self-play with a time budget per move, as a load test of the search)
+"""
+
+import argparse
+from time import perf_counter
+
+from search import AlphaBeta
+
+X = "X"
+O = "O"
+
+
+class MNKGame():
+
+    def __init__(self, rows=3, columns=3, k=3):
+        if not 1 <= k <= max(rows, columns):
+            raise Exception("k must fit on the board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.full = (1 << rows * columns) - 1
+
+        # Every line of k cells, as a mask
+        self.lines = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    cells = [(i + di * step, j + dj * step) for step in range(k)]
+                    if all(0 <= a < rows and 0 <= b < columns for a, b in cells):
+                        self.lines.append(
+                            sum(1 << columns * a + b for a, b in cells))
+
+        # Cells nearest the center first; they are on the most lines.
+        center = ((rows - 1) / 2, (columns - 1) / 2)
+        self.order = sorted(range(rows * columns), key=lambda cell: (
+            abs(cell // columns - center[0]) + abs(cell % columns - center[1]),
+            cell))
+
+        # A line with n marks of one player is worth WEIGHT ** n; scaling by
+        # the most all lines together could be worth keeps evaluations
+        # strictly between the -1 and 1 of a lost and a won game.
+        self.weight = 4
+        self.scale = 2 * len(self.lines) * self.weight ** k
+
+    def initial_state(self):
+        """
+        Returns the empty board.
+        """
+        return (0, 0)
+
+    def player(self, state):
+        """
+        Returns the player who has the next turn.
+        """
+        x, o = state
+        return X if bin(x).count("1") == bin(o).count("1") else O
+
+    def actions(self, state):
+        """
+        Returns the free cells, nearest the center first.
+        """
+        taken = state[0] | state[1]
+        return [cell for cell in self.order if not taken >> cell & 1]
+
+    def result(self, state, cell):
+        """
+        Returns the state after the player to move plays cell.
+        """
+        x, o = state
+        bit = 1 << cell
+        if (x | o) & bit or self.winner(state) is not None:
+            raise Exception("Invalid Move.")
+        if self.player(state) == X:
+            return (x | bit, o)
+        return (x, o | bit)
+
+    def winner(self, state):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = state
+        for line in self.lines:
+            if x & line == line:
+                return X
+            if o & line == line:
+                return O
+        return None
+
+    def terminal(self, state):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = state
+        return x | o == self.full or self.winner(state) is not None
+
+    def utility(self, state):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(state)]
+
+    def evaluate(self, state):
+        """
+        Estimates the value of a position that is not over, strictly
+        between -1 and 1: positive if X has more open lines, and fuller
+        ones, than O.
+        """
+        x, o = state
+        score = 0
+        for line in self.lines:
+            if not o & line:
+                score += self.weight ** bin(x & line).count("1")
+            if not x & line:
+                score -= self.weight ** bin(o & line).count("1")
+        return score / self.scale
+
+    def to_board(self, state):
+        """
+        Converts a state into a list-of-lists board of X, O and None.
+        """
+        x, o = state
+        return [[X if x >> self.columns * i + j & 1
+                 else O if o >> self.columns * i + j & 1 else None
+                 for j in range(self.columns)] for i in range(self.rows)]
+
+
+def self_play(game, budget):
+    """
+    Plays one game of the search against itself with budget seconds per
+    move, printing how deep and how fast every move was searched, and
+    returns the final state.
+    """
+    engine = AlphaBeta(game, bounds=(-1, 1))
+    state = game.initial_state()
+    slowest = 0
+    while not game.terminal(state):
+        nodes = engine.nodes
+        start = perf_counter()
+        cell = engine.search(state, budget)
+        elapsed = perf_counter() - start
+        slowest = max(slowest, elapsed)
+        nodes = engine.nodes - nodes
+        print(f"{game.player(state)} plays {divmod(cell, game.columns)}: "
+              f"depth {engine.depth}, {nodes} nodes in {elapsed:.3f}s "
+              f"({nodes / max(elapsed, 1e-9):.0f} nodes/s)")
+        state = game.result(state, cell)
+
+    for row in game.to_board(state):
+        print(" ".join(mark or "." for mark in row))
+    winner = game.winner(state)
+    print("Tie." if winner is None else f"{winner} wins.")
+    print(f"Slowest move: {slowest:.3f}s of a {budget}s budget")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play on an m,n,k board.")
+    parser.add_argument("shape", nargs="*", type=int, default=[4, 4, 4],
+                        help="rows, columns and k")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds of search per move")
+    args = parser.parse_args()
+    if len(args.shape) != 3:
+        parser.error("give rows, columns and k")
+    self_play(MNKGame(*args.shape), args.budget)
+
+
+if __name__ == "__main__":
+    main()
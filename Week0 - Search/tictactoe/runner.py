@@ -1,6 +1,8 @@
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
@@ -17,16 +19,52 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Frames drawn per second, whether or not the computer is thinking
+FPS = 30
+
+# Shortest time the computer seems to think for, in seconds
+THINKING_TIME = 0.5
+
+# The computer's moves are searched for on a worker thread, so the window
+# keeps drawing and handling events meanwhile. search holds the future of
+# the move being searched for, when it was asked for and the event that
+# stops it, or None.
+clock = pygame.time.Clock()
+worker = ThreadPoolExecutor(max_workers=1)
+search = None
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+
+def new_game():
+    """
+    Goes back to choosing a player. A search still running belongs to the
+    old game: it is stopped, so the worker is free for the next game's
+    moves, and whatever it returns is dropped.
+    """
+    global user, board, search
+    user = None
+    board = ttt.initial_state()
+    if search is not None:
+        future, _, cancel = search
+        cancel.set()
+        future.cancel()
+        search = None
+
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            worker.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
+        # Escape abandons the game at any time, even while the computer
+        # is thinking.
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            new_game()
+
     screen.fill(black)
 
     # Let user choose a player.
@@ -102,21 +140,24 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = int(time.time() * 3) % 3 + 1
+            title = "Computer thinking" + "." * dots
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move: start searching, or play the move once it is
+        # found and the computer has seemed to think for long enough.
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if search is None:
+                cancel = threading.Event()
+                search = (worker.submit(ttt.minimax, board, cancel),
+                          time.time(), cancel)
+            elif (search[0].done()
+                    and time.time() - search[1] >= THINKING_TIME):
+                board = ttt.result(board, search[0].result())
+                search = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -139,8 +180,7 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    new_game()
 
     pygame.display.flip()
+    clock.tick(FPS)
@@ -0,0 +1,191 @@
+"""
+Game-independent alpha-beta search.
+
+A game is anything (a module such as bitboard, or an object) providing
+initial_state(), player(state), actions(state), result(state, action),
+terminal(state) and utility(state), where utility is from the point of view
+of the player who moves first. If it also provides canonical(state), that is
+used as the transposition table key, so symmetric positions share an entry.
+
+Actions are searched in the order the game lists them, except that the best
+action found for a position before is tried first; good ordering is what
+makes alpha-beta cut off early.
+
+Games too big to search to the end can be searched to a limited depth,
+where evaluate(state) (a heuristic strictly between the utility bounds)
+stands in for the value. search() deepens one ply at a time until a time
+budget runs out and answers with the deepest search that finished.
+"""
+
+import math
+from time import perf_counter
+
+# Kinds of transposition table entries: the exact value, or only a bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Nodes visited between checks of the deadline and the cancel event
+CHECK_EVERY = 64
+
+
+class Timeout(Exception):
+    """
+    Raised inside a search when its deadline has passed or it was
+    cancelled.
+    """
+
+
+class AlphaBeta():
+    """
+    Alpha-beta minimax over a game. Values never leave bounds, the lowest and
+    highest utility of the game, which lets a proven win or loss cut off the
+    rest of its siblings. The table, if kept, outlives searches, so later
+    moves of a game reuse earlier work; nodes counts every state visited and
+    depth is the depth of the last search that finished. Setting cancel (a
+    threading.Event), e.g. from another thread, stops a running search with
+    Timeout.
+    """
+
+    def __init__(self, game, bounds=(-math.inf, math.inf), transpositions=True):
+        self.game = game
+        self.bounds = bounds
+        self.table = {} if transpositions else None
+        self.key = getattr(game, "canonical", lambda state: state)
+        self.evaluate = getattr(game, "evaluate", lambda state: 0)
+        self.maximizer = game.player(game.initial_state())
+        self.nodes = 0
+        self.depth = None
+        self.deadline = None
+        self.cancel = None
+
+    def ordered(self, state, hint=None):
+        """
+        Returns the actions of state, with hint first if it is one of them.
+        """
+        actions = self.game.actions(state)
+        if hint is None or hint not in actions:
+            return actions
+        return [hint] + [action for action in actions if action != hint]
+
+    def value(self, state, alpha=None, beta=None, depth=math.inf):
+        """
+        Returns the minimax value of state, looking depth moves ahead, if it
+        lies strictly between alpha and beta; otherwise returns a bound
+        beyond the one it fell outside of.
+        """
+        if alpha is None:
+            alpha = self.bounds[0]
+        if beta is None:
+            beta = self.bounds[1]
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and (
+                (self.deadline is not None and perf_counter() > self.deadline)
+                or (self.cancel is not None and self.cancel.is_set())):
+            raise Timeout()
+        game = self.game
+        if game.terminal(state):
+            return game.utility(state)
+        if depth <= 0:
+            return self.evaluate(state)
+
+        # A stored exact value, or a bound outside the window, answers it if
+        # it came from a search at least as deep.
+        key = None
+        hint = None
+        if self.table is not None:
+            key = self.key(state)
+            entry = self.table.get(key)
+            if entry is not None:
+                value, kind, hint, searched = entry
+                if searched >= depth and (
+                        kind == EXACT or (kind == LOWER and value >= beta)
+                        or (kind == UPPER and value <= alpha)):
+                    return value
+
+        maximizing = game.player(state) == self.maximizer
+        best = -math.inf if maximizing else math.inf
+        best_action = None
+        low, high = alpha, beta
+        for action in self.ordered(state, hint):
+            value = self.value(game.result(state, action), low, high, depth - 1)
+            if maximizing:
+                if value > best:
+                    best, best_action = value, action
+                low = max(low, best)
+            else:
+                if value < best:
+                    best, best_action = value, action
+                high = min(high, best)
+            if low >= high:
+                break
+
+        if self.table is not None:
+            if best <= alpha:
+                kind = UPPER
+            elif best >= beta:
+                kind = LOWER
+            else:
+                kind = EXACT
+            self.table[key] = (best, kind, best_action, depth)
+        return best
+
+    def best_action(self, state, depth=math.inf, hint=None):
+        """
+        Returns the best action for the player to move in state, looking
+        depth moves ahead (trying hint first), or None if the game is over.
+        """
+        game = self.game
+        if game.terminal(state):
+            return None
+        self.nodes += 1
+
+        # The table's hint may come from a reflection of this position; it is
+        # still a fine first guess as long as it is a legal action here.
+        if hint is None and self.table is not None:
+            entry = self.table.get(self.key(state))
+            if entry is not None:
+                hint = entry[2]
+
+        maximizing = game.player(state) == self.maximizer
+        alpha, beta = self.bounds
+        actions = self.ordered(state, hint)
+        best_action = actions[0]
+        for action in actions:
+            value = self.value(game.result(state, action), alpha, beta,
+                               depth - 1)
+            if maximizing and value > alpha:
+                alpha, best_action = value, action
+            elif not maximizing and value < beta:
+                beta, best_action = value, action
+            if alpha >= beta:
+                break
+        return best_action
+
+    def search(self, state, budget=None, max_depth=math.inf):
+        """
+        Returns the best action for the player to move in state found by
+        searching one, two, three... moves ahead until budget seconds have
+        passed (if given), max_depth is reached or the game is solved.
+        """
+        if self.game.terminal(state):
+            return None
+        self.deadline = None if budget is None else perf_counter() + budget
+        best = None
+        depth = 0
+        try:
+            while depth < max_depth:
+                depth += 1
+                best = self.best_action(state, depth, best)
+                self.depth = depth
+
+                # Searching deeper than the moves left would change nothing.
+                if depth >= len(self.game.actions(state)):
+                    break
+        except Timeout:
+            if best is None:
+                best = self.ordered(state)[0]
+        finally:
+            self.deadline = None
+        self.cancel = None
+        return best
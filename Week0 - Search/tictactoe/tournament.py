@@ -0,0 +1,170 @@
+"""
+Headless tictactoe tournament between engines, on a pool of processes.
+
+Every ordered pair of engines plays the given number of games, one as X and
+the other as O. Each worker process builds its own engines once, so their
+tables are shared by all the games it plays. The report gives games per
+second, each engine's average move latency and nodes per second, and the
+win/draw/loss matrix; perfect engines must never lose, and must draw
+against each other.
+"""
+import argparse
+import os
+import random
+from collections import defaultdict
+from multiprocessing import Pool
+from time import perf_counter
+
+import benchmark
+import bitboard
+import book
+from search import AlphaBeta
+
+# Engines that always find a best move
+PERFECT = {"minimax", "alpha-beta", "book"}
+
+# Engines of this worker process, by name, as (game, choose) pairs where
+# game.nodes counts the nodes searched so far
+engines = {}
+
+# Random generator of the game being played, reseeded for every game
+generator = random.Random()
+
+
+def random_engine():
+    """
+    Returns (game, choose) for an engine that plays any free cell.
+    """
+    game = benchmark.Counting(bitboard)
+    return game, lambda state: generator.choice(bitboard.actions(state))
+
+
+def book_engine():
+    """
+    Returns (game, choose) for an engine that reads its moves from the
+    opening book, searching only for positions it does not have.
+    """
+    game = benchmark.Counting(bitboard)
+    engine = AlphaBeta(game, bounds=(-1, 1))
+
+    def choose(state):
+        cell = book.move(state)
+        return engine.best_action(state) if cell is None else cell
+    return game, choose
+
+
+ENGINES = {
+    "random": random_engine,
+    "minimax": benchmark.ENGINES["minimax + table"],
+    "alpha-beta": benchmark.ENGINES["alpha-beta + table"],
+    "book": book_engine
+}
+
+
+def initialize(names):
+    """
+    Builds the engines of a worker process.
+    """
+    for name in names:
+        engines[name] = ENGINES[name]()
+
+
+def play(match):
+    """
+    Plays one (X engine, O engine, seed) match and returns the engines, the
+    winner, and per engine the moves made, seconds spent and nodes searched.
+    """
+    x_name, o_name, seed = match
+    generator.seed(seed)
+    names = {bitboard.X: x_name, bitboard.O: o_name}
+    spent = {name: [0, 0.0, 0] for name in (x_name, o_name)}
+    state = bitboard.initial_state()
+    while not bitboard.terminal(state):
+        name = names[bitboard.player(state)]
+        game, choose = engines[name]
+        nodes = game.nodes
+        start = perf_counter()
+        cell = choose(state)
+        spent[name][1] += perf_counter() - start
+        spent[name][0] += 1
+        spent[name][2] += game.nodes - nodes
+        state = bitboard.result(state, cell)
+    return x_name, o_name, bitboard.winner(state), spent
+
+
+def tournament(names, games, processes=None, seed=0, chunksize=64):
+    """
+    Plays games games for every ordered pair of engines and returns
+    (results, moves, elapsed): results[x, o] counts X wins, draws and O
+    wins, and moves[name] sums moves, seconds and nodes per engine.
+    """
+    matches = [(x, o, seed + n)
+               for x in names for o in names for n in range(games)]
+    results = defaultdict(lambda: [0, 0, 0])
+    moves = defaultdict(lambda: [0, 0.0, 0])
+    start = perf_counter()
+    with Pool(processes, initialize, (names,)) as pool:
+        for x, o, winner, spent in pool.imap_unordered(
+                play, matches, chunksize):
+            results[x, o][{bitboard.X: 0, None: 1, bitboard.O: 2}[winner]] += 1
+            for name, (count, seconds, nodes) in spent.items():
+                moves[name][0] += count
+                moves[name][1] += seconds
+                moves[name][2] += nodes
+
+            # Perfect play never loses, and two perfect players always draw.
+            if x in PERFECT and winner == bitboard.O:
+                raise Exception(f"{x} lost as X to {o}")
+            if o in PERFECT and winner == bitboard.X:
+                raise Exception(f"{o} lost as O to {x}")
+            if x in PERFECT and o in PERFECT and winner is not None:
+                raise Exception(f"{x} against {o} did not draw")
+    return results, moves, perf_counter() - start
+
+
+def report(names, results, moves, elapsed):
+    """
+    Prints the speed of the tournament and of every engine, and the
+    win/draw/loss matrix from X's point of view.
+    """
+    total = sum(sum(counts) for counts in results.values())
+    print(f"{total} games in {elapsed:.2f}s: {total / elapsed:.0f} games/s")
+    print()
+    print(f"{'engine':>12} {'moves':>8} {'ms/move':>9} {'nodes':>10} "
+          f"{'nodes/s':>10}")
+    for name in names:
+        count, seconds, nodes = moves[name]
+        print(f"{name:>12} {count:>8} {1000 * seconds / max(count, 1):>9.4f} "
+              f"{nodes:>10} {nodes / max(seconds, 1e-9):>10.0f}")
+    print()
+    print("X wins/draws/O wins, X down, O across")
+    print(f"{'':>12} " + " ".join(f"{name:>16}" for name in names))
+    for x in names:
+        print(f"{x:>12} " + " ".join(
+            f"{'/'.join(map(str, results[x, o])):>16}" for o in names))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("engines", nargs="*", default=list(ENGINES),
+                        help=f"any of: {', '.join(ENGINES)}")
+    parser.add_argument("-n", "--games", type=int, default=250,
+                        help="games per ordered pair of engines")
+    parser.add_argument("-p", "--processes", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for name in args.engines:
+        if name not in ENGINES:
+            parser.error(f"unknown engine {name}")
+    if "book" in args.engines and book.load() is None:
+        print("No book.bin; the book engine will search. "
+              "Run python book.py to build it.")
+
+    results, moves, elapsed = tournament(
+        args.engines, args.games, args.processes, args.seed)
+    report(args.engines, results, moves, elapsed)
+
+
+if __name__ == "__main__":
+    main()
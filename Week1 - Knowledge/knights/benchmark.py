@@ -0,0 +1,93 @@
+"""
+Benchmark of many entailment queries against one knowledge base.
+
+The knowledge base is a knights-and-knaves puzzle with any number of people:
+A says "I am a knave and B is a knight", and everyone after A says the next
+person is a knave, so exactly one model is left. The queries are, in turn,
+whether each person is a knight and whether they are a knave. Asking them
+one model_check at a time costs the same per query however many there are;
+entailed_symbols finds the models of the knowledge base once, so its cost
+per query drops as the number of queries grows.
+
+Usage: python benchmark.py [-n people] [--methods method...]
+"""
+
+import argparse
+from time import perf_counter
+
+from logic import And, Not, Or, Symbol, entailed_symbols, model_check
+
+METHODS = ["enumerate", "sat", "numpy"]
+
+
+def people(count):
+    """
+    Returns the knowledge base for count people, and its symbols: whether
+    each person is a knight, then whether they are a knave.
+    """
+    knights = [Symbol(f"{i} is a Knight") for i in range(count)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(count)]
+    knowledge = And()
+    for knight, knave in zip(knights, knaves):
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+
+    def says(i, sentence):
+        knowledge.add(Or(And(knights[i], sentence),
+                         And(knaves[i], Not(sentence))))
+
+    says(0, And(knaves[0], knights[1]))
+    for i in range(1, count - 1):
+        says(i, knaves[i + 1])
+    return knowledge, knights + knaves
+
+
+def measure(function, repeat):
+    """
+    Returns the fastest of repeat runs of function, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--people", type=int, default=8,
+                        help="people in the puzzle (two symbols each)")
+    parser.add_argument("--methods", nargs="+", default=METHODS,
+                        choices=METHODS)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs of each measurement; the fastest counts")
+    args = parser.parse_args()
+    if args.people < 2:
+        parser.error("the puzzle needs at least two people")
+
+    knowledge, symbols = people(args.people)
+    counts = [1]
+    while counts[-1] < len(symbols):
+        counts.append(min(2 * counts[-1], len(symbols)))
+
+    print(f"{len(symbols)} symbols; microseconds per query")
+    print(f"{'method':>10} {'queries':>8} {'model_check':>12} "
+          f"{'entailed_symbols':>17}")
+    for method in args.methods:
+        for count in counts:
+            queries = symbols[:count]
+            alone = measure(lambda: [model_check(knowledge, query, method)
+                                     for query in queries], args.repeat)
+            batch = measure(lambda: entailed_symbols(knowledge, queries,
+                                                     method), args.repeat)
+            expected = [query for query in queries
+                        if model_check(knowledge, query, method)]
+            if entailed_symbols(knowledge, queries, method) != expected:
+                raise Exception(f"{method} answers differ")
+            print(f"{method:>10} {count:>8} {1e6 * alone / count:>12.1f} "
+                  f"{1e6 * batch / count:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
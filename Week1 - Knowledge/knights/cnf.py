@@ -0,0 +1,196 @@
+"""
+Conjunctive normal form by Tseitin encoding.
+
+Every compound part of a sentence gets a new variable, defined by a few
+clauses to be true exactly when that part is, so a sentence turns into a
+number of clauses proportional to its size (distributing Or over And can
+blow up exponentially instead). The clauses are satisfiable exactly when the
+sentence is. Literals are ints: n for variable n, -n for its negation, as in
+the DIMACS format the clauses can be saved in and loaded back from.
+
+Usage: python cnf.py cnf_file
+(prints the symbols and clause counts of a saved CNF)
+"""
+
+import sys
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+    """
+    Clauses over variables 1, 2, 3...; names[n] is the symbol name of
+    variable n, or None if it was added by the encoding.
+    """
+
+    def __init__(self):
+        self.names = [None]
+        self.numbers = {}
+        self.clauses = []
+
+    def __len__(self):
+        return len(self.names) - 1
+
+    def copy(self):
+        cnf = CNF()
+        cnf.names = self.names.copy()
+        cnf.numbers = self.numbers.copy()
+        cnf.clauses = self.clauses.copy()
+        return cnf
+
+    def variable(self, name=None):
+        """
+        Returns the variable of a symbol name, numbering it if it is new,
+        or a new unnamed variable if name is None.
+        """
+        if name is not None and name in self.numbers:
+            return self.numbers[name]
+        number = len(self.names)
+        self.names.append(name)
+        if name is not None:
+            self.numbers[name] = number
+        return number
+
+    def add(self, sentence, positive=True, literals=None):
+        """
+        Adds clauses that hold (or, if positive is False, fail) exactly
+        when sentence does.
+        """
+        if literals is None:
+            literals = {}
+
+        # Conjunctions and single clauses at the top need no new variables.
+        if isinstance(sentence, Not):
+            self.add(sentence.operand, not positive, literals)
+        elif isinstance(sentence, And) and positive:
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct, True, literals)
+        elif isinstance(sentence, Or) and not positive:
+            for disjunct in sentence.disjuncts:
+                self.add(disjunct, False, literals)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct, literals)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, And):
+            self.clauses.append([-self.literal(conjunct, literals)
+                                 for conjunct in sentence.conjuncts])
+        elif isinstance(sentence, Implication) and positive:
+            self.clauses.append([-self.literal(sentence.antecedent, literals),
+                                 self.literal(sentence.consequent, literals)])
+        else:
+            literal = self.literal(sentence, literals)
+            self.clauses.append([literal if positive else -literal])
+
+    def literal(self, sentence, literals):
+        """
+        Returns a literal that is true exactly when sentence is, defining
+        new variables as needed; literals caches those of the parts of
+        sentences seen so far, by id.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand, literals)
+        if id(sentence) in literals:
+            return literals[id(sentence)][1]
+
+        if isinstance(sentence, And):
+            parts = [self.literal(conjunct, literals)
+                     for conjunct in sentence.conjuncts]
+            v = self.variable()
+            self.clauses.extend([-v, part] for part in parts)
+            self.clauses.append([v] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(disjunct, literals)
+                     for disjunct in sentence.disjuncts]
+            v = self.variable()
+            self.clauses.extend([v, -part] for part in parts)
+            self.clauses.append([-v] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent, literals)
+            b = self.literal(sentence.consequent, literals)
+            v = self.variable()
+            self.clauses.extend([[v, a], [v, -b], [-v, -a, b]])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left, literals)
+            b = self.literal(sentence.right, literals)
+            v = self.variable()
+            self.clauses.extend([[-v, -a, b], [-v, a, -b],
+                                 [v, a, b], [v, -a, -b]])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        # Keep the sentence alive so that its id is not reused.
+        literals[id(sentence)] = (sentence, v)
+        return v
+
+    def write(self, path):
+        """
+        Saves the clauses in DIMACS format, with the symbol names as
+        comments.
+        """
+        with open(path, "w") as f:
+            for number, name in enumerate(self.names):
+                if name is not None:
+                    f.write(f"c symbol {number} {name}\n")
+            f.write(f"p cnf {len(self)} {len(self.clauses)}\n")
+            for clause in self.clauses:
+                f.write(" ".join(map(str, clause)) + " 0\n")
+
+    @classmethod
+    def read(cls, path):
+        """
+        Loads clauses saved in DIMACS format; variables without a symbol
+        comment have no name.
+        """
+        cnf = cls()
+        names = {}
+        header = None
+        clause = []
+        with open(path) as f:
+            for line in f:
+                if line.startswith("c"):
+                    words = line.split(maxsplit=3)
+                    if len(words) == 4 and words[1] == "symbol":
+                        names[int(words[2])] = words[3].rstrip("\n")
+                    continue
+                if line.startswith("p"):
+                    words = line.split()
+                    if len(words) != 4 or words[1] != "cnf":
+                        raise Exception(
+                            f"invalid DIMACS header: {line.strip()}")
+                    header = (int(words[2]), int(words[3]))
+                    continue
+                for literal in map(int, line.split()):
+                    if literal == 0:
+                        cnf.clauses.append(clause)
+                        clause = []
+                    else:
+                        clause.append(literal)
+        if header is None:
+            raise Exception(f"{path} has no DIMACS header")
+        if clause:
+            cnf.clauses.append(clause)
+        count, clauses = header
+        if len(cnf.clauses) != clauses:
+            raise Exception(f"{path} has {len(cnf.clauses)} clauses, "
+                            f"not {clauses}")
+        if any(abs(literal) > count
+               for clause in cnf.clauses for literal in clause):
+            raise Exception(f"{path} uses variables beyond {count}")
+        cnf.names = [names.get(number) for number in range(count + 1)]
+        cnf.numbers = {name: number for number, name in names.items()}
+        return cnf
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python cnf.py cnf_file")
+    cnf = CNF.read(sys.argv[1])
+    print(f"{len(cnf)} variables, {len(cnf.clauses)} clauses")
+    for name in sorted(cnf.numbers):
+        print(f"    {cnf.numbers[name]}: {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import functools
 import itertools
 
 
@@ -15,6 +16,24 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def source(self, index):
+        """Returns a Python expression for the sentence over int `bits`."""
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols):
+        """
+        Returns a function of an int-encoded model (bit i set if symbols[i]
+        is true) that returns whether the sentence is true in it.
+        """
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        try:
+            return compiled(self.source(index))
+        except (RecursionError, SyntaxError, MemoryError):
+
+            # Too deeply nested for the parser: evaluate the tree instead.
+            return lambda bits: self.evaluate(
+                {symbol: bool(bits >> i & 1) for symbol, i in index.items()})
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +87,12 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def source(self, index):
+        try:
+            return f"(bits >> {index[self.name]} & 1)"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -92,6 +117,9 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def source(self, index):
+        return f"(not {self.operand.source(index)})"
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +157,12 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def source(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            [conjunct.source(index) for conjunct in self.conjuncts]) + ")"
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +194,12 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def source(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            [disjunct.source(index) for disjunct in self.disjuncts]) + ")"
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +231,11 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def source(self, index):
+        antecedent = self.antecedent.source(index)
+        consequent = self.consequent.source(index)
+        return f"(not {antecedent} or {consequent})"
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -224,40 +269,72 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+    def source(self, index):
+        left = self.left.source(index)
+        right = self.right.source(index)
+        return f"((not {left}) == (not {right}))"
+
+
+@functools.lru_cache(maxsize=256)
+def compiled(source):
+    """Returns the function of bits that a sentence's source compiles to."""
+    return eval(f"lambda bits: {source}")
+
+
+def model_check(knowledge, query, method="enumerate"):
+    """
+    Checks if knowledge base entails query, by enumerating every model
+    (with the sentences compiled to one function of an int-encoded model),
+    with method="numpy" by evaluating the truth table 64 models at a time,
+    or with method="sat" by searching for a model of knowledge ∧ ¬query.
+    """
+    if method == "sat":
+        import sat
+        return sat.entails(knowledge, query)
+    if method == "numpy":
+        import truthtable
+        return truthtable.model_check(knowledge, query)
+    if method != "enumerate":
+        raise Exception(f"unknown method {method}")
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # Check that query is true in every model where knowledge is true
+    knows = knowledge.compile(symbols)
+    holds = query.compile(symbols)
+    return all(holds(bits) for bits in range(2 ** len(symbols)) if knows(bits))
+
+
+def entailed_symbols(knowledge, candidates, method="enumerate"):
+    """
+    Returns the candidates (symbols or other sentences) that knowledge base
+    entails, in order, going through the models of the knowledge base only
+    once for all of them; method is as for model_check.
+    """
+    candidates = list(candidates)
+    if method == "sat":
+        import sat
+        return sat.entailed(knowledge, candidates)
+    if method == "numpy":
+        import truthtable
+        return truthtable.entailed(knowledge, candidates)
+    if method != "enumerate":
+        raise Exception(f"unknown method {method}")
+
+    # Go through the models of the knowledge base once, dropping every
+    # candidate that is false in one of them
+    symbols = knowledge.symbols()
+    for candidate in candidates:
+        symbols |= candidate.symbols()
+    symbols = sorted(symbols)
+    knows = knowledge.compile(symbols)
+    remaining = [(candidate, candidate.compile(symbols))
+                 for candidate in candidates]
+    for bits in range(2 ** len(symbols)):
+        if knows(bits):
+            remaining = [(candidate, holds) for candidate, holds in remaining
+                         if holds(bits)]
+            if not remaining:
+                break
+    return [candidate for candidate, _ in remaining]
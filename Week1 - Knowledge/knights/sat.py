@@ -0,0 +1,247 @@
+"""
+Entailment by satisfiability.
+
+The knowledge base entails the query exactly when knowledge ∧ ¬query has no
+model. Both are turned into clauses over integer literals by cnf.py, and a
+DPLL solver looks for a model: it propagates unit clauses through two
+watched literals per clause, sets pure literals before searching, and
+otherwise branches on the variables that appear in the most clauses,
+backtracking chronologically.
+"""
+
+from cnf import CNF
+
+
+def simplify(clause):
+    """
+    Removes repeated literals from a clause, or returns None if it
+    contains a literal and its negation (so it always holds).
+    """
+    literals = set(clause)
+    if any(-literal in literals for literal in literals):
+        return None
+    return sorted(literals, key=abs)
+
+
+class Solver():
+    """
+    DPLL solver over clauses of integer literals, for symbols 1 to count.
+    """
+
+    def __init__(self, clauses, count):
+        self.count = count
+        self.clauses = []
+        self.units = []
+        self.empty = False
+        self.watches = {}
+        occurrences = [0] * (count + 1)
+        for clause in clauses:
+            clause = simplify(clause)
+            if clause is None:
+                continue
+            for literal in clause:
+                occurrences[abs(literal)] += 1
+            if not clause:
+                self.empty = True
+            elif len(clause) == 1:
+                self.units.append(clause[0])
+            else:
+                self.watch(len(self.clauses), clause)
+                self.clauses.append(clause)
+
+        # Branch on the symbols in the most clauses first.
+        self.order = sorted(range(1, count + 1),
+                            key=lambda number: -occurrences[number])
+        self.polarity = {}
+        for clause in self.clauses:
+            for literal in clause:
+                self.polarity[literal] = True
+        self.values = [0] * (count + 1)
+        self.trail = []
+        self.head = 0
+
+    def watch(self, index, clause):
+        for literal in clause[:2]:
+            self.watches.setdefault(literal, []).append(index)
+
+    def value(self, literal):
+        """
+        Returns 1 if literal is true, -1 if it is false and 0 if unset.
+        """
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def assign(self, literal):
+        """
+        Makes literal true, or returns False if it is already false.
+        """
+        value = self.value(literal)
+        if value:
+            return value > 0
+        self.values[abs(literal)] = 1 if literal > 0 else -1
+        self.trail.append(literal)
+        return True
+
+    def propagate(self):
+        """
+        Sets every literal that is the last one left unset in a clause whose
+        other literals are false; returns False on a clause that is all false.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches.get(false, [])
+            i = 0
+            while i < len(watchers):
+                index = watchers[i]
+                clause = self.clauses[index]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) > 0:
+                    i += 1
+                    continue
+
+                # Watch another literal that is not false, if there is one.
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) >= 0:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        watchers[i] = watchers[-1]
+                        watchers.pop()
+                        break
+                else:
+                    if not self.assign(clause[0]):
+                        return False
+                    i += 1
+        return True
+
+    def undo(self, length):
+        """
+        Unsets every literal set since the trail was length long.
+        """
+        for literal in self.trail[length:]:
+            self.values[abs(literal)] = 0
+        del self.trail[length:]
+        self.head = length
+
+    def solve(self, assumptions=()):
+        """
+        Returns a model ({symbol number: bool}) satisfying every clause with
+        all assumption literals true, or None if there is none.
+        """
+        self.undo(0)
+        if self.empty:
+            return None
+        for literal in self.units:
+            if not self.assign(literal):
+                return None
+        if not self.propagate():
+            return None
+
+        # A literal whose negation appears nowhere can simply be made true,
+        # unless an assumption is about its symbol.
+        assumed = {abs(literal) for literal in assumptions}
+        for literal in list(self.polarity):
+            if (-literal not in self.polarity and abs(literal) not in assumed
+                    and not self.value(literal)):
+                self.assign(literal)
+        if not self.propagate():
+            return None
+
+        # Each level is (trail length before it, literal, whether flipped);
+        # assumptions are levels that may not be flipped.
+        levels = []
+        for literal in assumptions:
+            levels.append((len(self.trail), literal, True))
+            if not self.assign(literal) or not self.propagate():
+                self.undo(0)
+                return None
+
+        while True:
+            literal = self.decide()
+            if literal is None:
+                model = {number: self.values[number] > 0
+                         for number in range(1, self.count + 1)}
+                self.undo(0)
+                return model
+            levels.append((len(self.trail), literal, False))
+            self.assign(literal)
+            while not self.propagate():
+
+                # Go back to the last decision not yet tried both ways.
+                while levels and levels[-1][2]:
+                    levels.pop()
+                if not levels:
+                    self.undo(0)
+                    return None
+                length, literal, _ = levels.pop()
+                self.undo(length)
+                levels.append((length, -literal, True))
+                self.assign(-literal)
+
+    def decide(self):
+        """
+        Returns the next literal to try, or None if every symbol is set.
+        """
+        for number in self.order:
+            if not self.values[number]:
+                return number if number in self.polarity else -number
+        return None
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of sentence ({symbol name: bool}) or None.
+    """
+    cnf = CNF()
+    for name in sorted(sentence.symbols()):
+        cnf.variable(name)
+    cnf.add(sentence)
+    model = Solver(cnf.clauses, len(cnf)).solve()
+    if model is None:
+        return None
+    return {name: model[number] for name, number in cnf.numbers.items()}
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base (a sentence, or a CNF of one) entails query,
+    by checking that knowledge ∧ ¬query is unsatisfiable.
+    """
+    if isinstance(knowledge, CNF):
+        cnf = knowledge.copy()
+    else:
+        cnf = CNF()
+        cnf.add(knowledge)
+    cnf.add(query, positive=False)
+    return Solver(cnf.clauses, len(cnf)).solve() is None
+
+
+def entailed(knowledge, candidates):
+    """
+    Returns the candidates that knowledge base (a sentence, or a CNF of one)
+    entails, in order, with one solver for all of them: a candidate is
+    entailed if there is no model with it assumed false, and every model
+    found on the way rules out the candidates false in it.
+    """
+    if isinstance(knowledge, CNF):
+        cnf = knowledge.copy()
+    else:
+        cnf = CNF()
+        cnf.add(knowledge)
+    literals = {}
+    targets = [cnf.literal(candidate, literals) for candidate in candidates]
+    solver = Solver(cnf.clauses, len(cnf))
+
+    refuted = set()
+    for i, target in enumerate(targets):
+        if i in refuted:
+            continue
+        model = solver.solve([-target])
+        if model is None:
+            continue
+        for j, other in enumerate(targets):
+            if model[abs(other)] != (other > 0):
+                refuted.add(j)
+    return [candidate for i, candidate in enumerate(candidates)
+            if i not in refuted]
@@ -0,0 +1,130 @@
+"""
+Truth tables evaluated with NumPy, 64 models at a time.
+
+Models are numbered 0 to 2^n - 1, with bit i of a model's number the value
+of the i-th symbol (in sorted order), and a column holds one bit per model:
+bit j of word w is model 64 * w + j. The columns of the symbols are fixed
+bit patterns, so a whole sentence is evaluated by a few bitwise operations
+on arrays of words per connective. Models are taken CHUNK at a time, which
+bounds the memory used however many symbols there are.
+"""
+
+import numpy as np
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Models per chunk (a column of a chunk takes CHUNK / 8 bytes)
+CHUNK = 1 << 22
+
+# Columns of the first six symbols within a word
+PATTERNS = [np.uint64(sum(1 << j for j in range(64) if j >> i & 1))
+            for i in range(6)]
+
+ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def chunks(symbols):
+    """
+    Yields, for every chunk of models, the columns of the symbols (a
+    dictionary by name) and a mask of the bits that are models.
+    """
+    count = 1 << len(symbols)
+    words = max(count // 64, 1)
+    for first in range(0, words, CHUNK // 64):
+        index = np.arange(first, min(first + CHUNK // 64, words),
+                          dtype=np.uint64)
+        columns = {}
+        for i, symbol in enumerate(symbols):
+            if i < 6:
+                columns[symbol] = np.full(len(index), PATTERNS[i])
+            else:
+                bit = (index >> np.uint64(i - 6)) & np.uint64(1)
+                columns[symbol] = np.where(bit, ONES, np.uint64(0))
+
+        # With fewer than six symbols, only the first count bits are models.
+        mask = np.full(len(index), ONES if count >= 64
+                       else np.uint64((1 << count) - 1))
+        yield columns, mask
+
+
+def evaluate(sentence, columns, mask):
+    """
+    Returns the column of a sentence, given the columns of its symbols.
+    """
+    if isinstance(sentence, Symbol):
+        try:
+            return columns[sentence.name]
+        except KeyError:
+            raise Exception(f"variable {sentence.name} not in model")
+    if isinstance(sentence, Not):
+        return ~evaluate(sentence.operand, columns, mask)
+    if isinstance(sentence, And):
+        column = mask
+        for conjunct in sentence.conjuncts:
+            column = column & evaluate(conjunct, columns, mask)
+        return column
+    if isinstance(sentence, Or):
+        column = ~mask
+        for disjunct in sentence.disjuncts:
+            column = column | evaluate(disjunct, columns, mask)
+        return column
+    if isinstance(sentence, Implication):
+        return (~evaluate(sentence.antecedent, columns, mask)
+                | evaluate(sentence.consequent, columns, mask))
+    if isinstance(sentence, Biconditional):
+        return ~(evaluate(sentence.left, columns, mask)
+                 ^ evaluate(sentence.right, columns, mask))
+    raise TypeError("must be a logical sentence")
+
+
+def popcount(column):
+    """
+    Returns the number of bits set in a column.
+    """
+    return int(np.unpackbits(column.view(np.uint8)).sum())
+
+
+def symbols_of(*sentences):
+    """
+    Returns the symbols of all the sentences, sorted.
+    """
+    return sorted(set.union(*[sentence.symbols() for sentence in sentences]))
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query.
+    """
+    for columns, mask in chunks(symbols_of(knowledge, query)):
+        if (evaluate(knowledge, columns, mask)
+                & ~evaluate(query, columns, mask) & mask).any():
+            return False
+    return True
+
+
+def count(sentence, symbols=None):
+    """
+    Returns the number of models of sentence over symbols (by default its
+    own symbols).
+    """
+    if symbols is None:
+        symbols = symbols_of(sentence)
+    return sum(popcount(evaluate(sentence, columns, mask) & mask)
+               for columns, mask in chunks(symbols))
+
+
+def entailed(knowledge, candidates):
+    """
+    Returns the candidate sentences that knowledge base entails, in order,
+    evaluating the knowledge base once per chunk of models.
+    """
+    candidates = list(candidates)
+    remaining = set(range(len(candidates)))
+    for columns, mask in chunks(symbols_of(knowledge, *candidates)):
+        knows = evaluate(knowledge, columns, mask) & mask
+        for i in list(remaining):
+            if (knows & ~evaluate(candidates[i], columns, mask)).any():
+                remaining.remove(i)
+        if not remaining:
+            break
+    return [candidates[i] for i in sorted(remaining)]